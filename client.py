@@ -9,49 +9,41 @@ import json
 import sys
 import subprocess
 import os
-import threading
-import time
+import re
 from typing import Optional, Dict, Any, List
 
-# ==================== UTILITIES ====================
+from ollama_mcp_client.mcp.session import MCPSession
+from ollama_mcp_client.mcp.tool_discovery import function_parameters
+from ollama_mcp_client.mcp.tools import format_tool_entry
+from ollama_mcp_client.ui.output import BufferedPrinter
+from ollama_mcp_client.utils.helpers import LoadingIndicator, ainput
 
-class LoadingIndicator:
-    """Shows a loading animation while waiting for responses."""
-    
-    def __init__(self, message="🤖 Assistant: "):
-        self.message = message
-        self.chars = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
-        self.running = False
-        self.thread = None
-    
-    def start(self):
-        """Start the loading animation."""
-        if self.running:
-            return
-        self.running = True
-        print(self.message, end="", flush=True)
-        self.thread = threading.Thread(target=self._animate)
-        self.thread.daemon = True
-        self.thread.start()
-    
-    def stop(self):
-        """Stop the loading animation and clear the line."""
-        if not self.running:
-            return
-        self.running = False
-        if self.thread:
-            self.thread.join(timeout=0.1)
-        # Clear the loading indicator
-        print("\r" + " " * (len(self.message) + 2) + "\r", end="", flush=True)
-        print(self.message, end="", flush=True)
-    
-    def _animate(self):
-        """Run the loading animation."""
-        i = 0
-        while self.running:
-            print(f"\r{self.message}{self.chars[i % len(self.chars)]}", end="", flush=True)
-            time.sleep(0.1)
-            i += 1
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json is the fallback
+    orjson = None
+
+
+def _dumps(obj) -> bytes:
+    """Encode a message as newline-terminated JSON bytes (stdio frame or HTTP body)."""
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj) + "\n").encode()
+
+
+def _loads(data: bytes):
+    """Decode a JSON-RPC frame straight from bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Ollama request bodies are pre-serialized with _dumps, so the content type is set explicitly
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+# Pattern to match [TOOL:name:args]
+_TOOL_CALL_RE = re.compile(r'\[TOOL:([^:]+):([^\]]*)\]')
 
 # ==================== PHASE 2: REFACTORED COMPONENTS ====================
 
@@ -147,22 +139,46 @@ class ServerManager:
                 
         elif server_type == "subprocess":
             command = config.get("command")
-            args = config.get("args", [])
+            args = [self._expand_project_root(str(arg)) for arg in config.get("args", [])]
             if command:
+                # Relative working directories are taken from the config file's location, not the shell's
+                cwd = os.path.join(self._config_dir(), self._expand_project_root(config.get("cwd", ".")))
                 self.servers[name] = {
                     "type": "subprocess",
                     "config": config,
                     "command": command,
-                    "args": args
+                    "args": args,
+                    # One persistent stdio session serves discovery and every call; it spawns on first use
+                    "session": MCPSession(
+                        [command, *args],
+                        cwd=cwd,
+                        env={**os.environ, **config.get("env", {})},
+                        timeout=self.config_manager.get_settings().get("tool_timeout", 30)
+                    )
                 }
                 print(f"✅ Initialized subprocess server: {name}")
             else:
                 print(f"⚠️  Subprocess server '{name}' missing command")
     
+    def _config_dir(self) -> str:
+        """Get the directory holding the config file."""
+        return os.path.dirname(os.path.abspath(self.config_manager.config_path))
+    
+    def _expand_project_root(self, value: str) -> str:
+        """Substitute ${PROJECT_ROOT}, defaulting it to the config file's directory."""
+        if "${PROJECT_ROOT}" not in value:
+            return value
+        return value.replace("${PROJECT_ROOT}", os.environ.get("PROJECT_ROOT") or self._config_dir())
+    
     def get_servers(self) -> dict:
         """Get all initialized servers."""
         return self.servers
     
+    async def shutdown(self):
+        """Close every subprocess session."""
+        sessions = [info["session"] for info in self.servers.values() if info.get("session")]
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+    
     def get_server(self, server_name: str) -> Optional[dict]:
         """Get a specific server."""
         return self.servers.get(server_name)
@@ -188,20 +204,25 @@ class ToolDiscovery:
     async def discover_all_tools(self) -> List[dict]:
         """Discover tools from all initialized servers."""
         all_tools = []
+        servers = self.server_manager.get_servers()
         
-        for server_name, server_info in self.server_manager.get_servers().items():
-            try:
-                tools = await self._discover_server_tools(server_name, server_info)
-                for tool in tools:
-                    # Prefix tool names with server name to avoid conflicts
-                    tool["server"] = server_name
-                    tool["name"] = f"{server_name}_{tool['name']}"
-                    all_tools.append(tool)
-                    
-                print(f"📋 Discovered {len(tools)} tools from server '{server_name}'")
+        # Each server spawns and handshakes independently, so discover them concurrently
+        results = await asyncio.gather(
+            *(self._discover_server_tools(server_name, server_info) for server_name, server_info in servers.items()),
+            return_exceptions=True
+        )
+        
+        for server_name, tools in zip(servers, results):
+            if isinstance(tools, Exception):
+                print(f"⚠️  Error discovering tools from server '{server_name}': {tools}")
+                continue
+            for tool in tools:
+                # Prefix tool names with server name to avoid conflicts
+                tool["server"] = server_name
+                tool["name"] = f"{server_name}_{tool['name']}"
+                all_tools.append(tool)
                 
-            except Exception as e:
-                print(f"⚠️  Error discovering tools from server '{server_name}': {e}")
+            print(f"📋 Discovered {len(tools)} tools from server '{server_name}'")
         
         return all_tools
     
@@ -230,109 +251,26 @@ class ToolDiscovery:
     
     async def _discover_subprocess_tools(self, server_info: dict) -> list:
         """Discover tools from a subprocess MCP server."""
+        session = server_info.get("session")
+        if not session:
+            print(f"⚠️  No command specified for subprocess server")
+            return []
+        
         try:
-            command = server_info.get("command")
-            args = server_info.get("args", [])
-            cwd = server_info.get("cwd", ".")
-            env = server_info.get("env", {})
-            
-            if not command:
-                print(f"⚠️  No command specified for subprocess server")
-                return []
-            
-            # Start the MCP server process
-            full_env = dict(os.environ)
-            full_env.update(env)
-            
-            # Create the subprocess
-            process = await asyncio.create_subprocess_exec(
-                command, *args,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=cwd,
-                env=full_env
-            )
-            
-            # Send initialize request to get tools
-            initialize_request = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {},
-                    "clientInfo": {
-                        "name": "ollama-mcp-client",
-                        "version": "1.0.0"
+            # The session stays open after discovery, so tool calls skip spawning and the handshake
+            tools_response = await session.request("tools/list")
+            tools = []
+            if "result" in tools_response and "tools" in tools_response["result"]:
+                for tool_data in tools_response["result"]["tools"]:
+                    tool_info = {
+                        "name": tool_data.get("name", ""),
+                        "description": tool_data.get("description", ""),
+                        "parameters": tool_data.get("inputSchema", {}).get("properties", {}),
+                        "subprocess_info": server_info,  # Store for later calling
+                        "tool_schema": tool_data  # Store original schema
                     }
-                }
-            }
-            
-            request_json = json.dumps(initialize_request) + "\n"
-            process.stdin.write(request_json.encode())
-            await process.stdin.drain()
-            
-            # Read the response
-            response_line = await process.stdout.readline()
-            if response_line:
-                try:
-                    response = json.loads(response_line.decode().strip())
-                    if "result" in response:
-                        # Send initialized notification
-                        initialized_notification = {
-                            "jsonrpc": "2.0",
-                            "method": "notifications/initialized",
-                            "params": {}
-                        }
-                        
-                        notification_json = json.dumps(initialized_notification) + "\n"
-                        process.stdin.write(notification_json.encode())
-                        await process.stdin.drain()
-                        
-                        # Small delay to let server process notification
-                        await asyncio.sleep(0.1)
-                        
-                        # Server initialized, now get tools
-                        tools_request = {
-                            "jsonrpc": "2.0",
-                            "id": 2,
-                            "method": "tools/list",
-                            "params": {}
-                        }
-                        
-                        request_json = json.dumps(tools_request) + "\n"
-                        process.stdin.write(request_json.encode())
-                        await process.stdin.drain()
-                        
-                        # Read tools response
-                        tools_response_line = await process.stdout.readline()
-                        if tools_response_line:
-                            tools_response = json.loads(tools_response_line.decode().strip())
-                            if "result" in tools_response and "tools" in tools_response["result"]:
-                                tools = []
-                                for tool_data in tools_response["result"]["tools"]:
-                                    tool_info = {
-                                        "name": tool_data.get("name", ""),
-                                        "description": tool_data.get("description", ""),
-                                        "parameters": tool_data.get("inputSchema", {}).get("properties", {}),
-                                        "subprocess_info": server_info,  # Store for later calling
-                                        "tool_schema": tool_data  # Store original schema
-                                    }
-                                    tools.append(tool_info)
-                                
-                                # Terminate the process
-                                process.stdin.close()
-                                await process.wait()
-                                
-                                return tools
-                except json.JSONDecodeError as e:
-                    print(f"⚠️  Error parsing MCP server response: {e}")
-            
-            # Clean up process
-            process.stdin.close()
-            await process.wait()
-            return []
+                    tools.append(tool_info)
+            return tools
             
         except Exception as e:
             print(f"⚠️  Error discovering subprocess tools: {e}")
@@ -380,7 +318,7 @@ class OllamaHTTPClient(LLMClient):
         try:
             async with self.session.get(f"{self.base_url}/api/tags") as response:
                 response.raise_for_status()
-                data = await response.json()
+                data = _loads(await response.read())
                 return [model['name'] for model in data.get('models', [])]
         except aiohttp.ClientError as e:
             print(f"Error connecting to Ollama server: {e}")
@@ -406,9 +344,9 @@ class OllamaHTTPClient(LLMClient):
             if tools:
                 payload["tools"] = tools
             
-            async with self.session.post(f"{self.base_url}/api/chat", json=payload) as response:
+            async with self.session.post(f"{self.base_url}/api/chat", data=_dumps(payload), headers=_JSON_HEADERS) as response:
                 response.raise_for_status()
-                return await response.json()
+                return _loads(await response.read())
                 
         except aiohttp.ClientError as e:
             print(f"Error communicating with Ollama: {e}")
@@ -434,13 +372,13 @@ class OllamaHTTPClient(LLMClient):
             if tools:
                 payload["tools"] = tools
             
-            async with self.session.post(f"{self.base_url}/api/chat", json=payload) as response:
+            async with self.session.post(f"{self.base_url}/api/chat", data=_dumps(payload), headers=_JSON_HEADERS) as response:
                 response.raise_for_status()
                 
                 async for line in response.content:
-                    if line:
+                    if line.strip():
                         try:
-                            chunk = json.loads(line.decode().strip())
+                            chunk = _loads(line)
                             yield chunk
                         except json.JSONDecodeError:
                             continue
@@ -602,36 +540,37 @@ class ToolIntegratedLLMClient:
     
     async def _process_tool_calls_async(self, text: str) -> str:
         """Process custom tool call format [TOOL:name:args] in text with proper async execution."""
-        import re
-        
-        # Pattern to match [TOOL:name:args]
-        pattern = r'\[TOOL:([^:]+):([^\]]*)\]'
-        matches = re.findall(pattern, text)
+        if "[TOOL:" not in text:
+            return text
         
+        matches = list(_TOOL_CALL_RE.finditer(text))
         if not matches:
             return text
         
-        # Process each tool call found
-        result_text = text
-        for tool_name, args_str in matches:
-            try:
-                arguments = json.loads(args_str) if args_str.strip() else {}
-                if self.mcp_tools:
-                    tool_result = await self.mcp_tools.call_tool(tool_name, arguments)
-                    replacement = f"🔧 {tool_name}: {tool_result}"
-                else:
-                    replacement = f"❌ No MCP tools available for {tool_name}"
-                    
-                # Replace the tool call with the result
-                tool_call_pattern = f"\\[TOOL:{re.escape(tool_name)}:{re.escape(args_str)}\\]"
-                result_text = re.sub(tool_call_pattern, replacement, result_text)
-                
-            except Exception as e:
-                replacement = f"❌ Error calling {tool_name}: {e}"
-                tool_call_pattern = f"\\[TOOL:{re.escape(tool_name)}:{re.escape(args_str)}\\]"
-                result_text = re.sub(tool_call_pattern, replacement, result_text)
+        # Run every tool call concurrently, then splice results in by match span
+        replacements = await asyncio.gather(*(self._run_tool_marker(match) for match in matches))
+        
+        parts = []
+        last_end = 0
+        for match, replacement in zip(matches, replacements):
+            parts.append(text[last_end:match.start()])
+            parts.append(replacement)
+            last_end = match.end()
         
-        return result_text
+        parts.append(text[last_end:])
+        return "".join(parts)
+    
+    async def _run_tool_marker(self, match) -> str:
+        """Execute one [TOOL:name:args] marker and render its replacement text."""
+        tool_name, args_str = match.groups()
+        try:
+            arguments = json.loads(args_str) if args_str.strip() else {}
+            if self.mcp_tools:
+                tool_result = await self.mcp_tools.call_tool(tool_name, arguments)
+                return f"🔧 {tool_name}: {tool_result}"
+            return f"❌ No MCP tools available for {tool_name}"
+        except Exception as e:
+            return f"❌ Error calling {tool_name}: {e}"
     
     def _process_tool_calls(self, text: str) -> str:
         """Sync version for streaming - just returns text as-is."""
@@ -651,33 +590,24 @@ class MCPTools:
         
         # Keep original interface
         self.available_tools = []
+        self._tool_index = {}
+        self._tools_by_server = {}
+        self._tools_desc_cache = None
         self.config_path = config_path
-        self.config = self.config_manager.config
-        self.servers = {}
         
-    def _load_config(self) -> dict:
-        """Load configuration from JSON file."""
-        try:
-            with open(self.config_path, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print(f"⚠️  Config file {self.config_path} not found. Using default config.")
-            return {
-                "mcp_servers": {
-                    "local_server": {
-                        "type": "local",
-                        "script_path": "server.py",
-                        "description": "Default local MCP server"
-                    }
-                },
-                "settings": {
-                    "auto_discover_tools": True,
-                    "tool_timeout": 30
-                }
-            }
-        except json.JSONDecodeError as e:
-            print(f"⚠️  Error parsing config file: {e}")
-            return {}
+        # Imported server scripts: abspath -> (mtime, module)
+        self._module_cache = {}
+        self._sys_path_dirs = set()
+    
+    @property
+    def config(self) -> dict:
+        """Loaded configuration (owned by the config manager)."""
+        return self.config_manager.config
+    
+    @property
+    def servers(self) -> dict:
+        """Initialized servers (owned by the server manager)."""
+        return self.server_manager.servers
     
     # ==================== SERVER MANAGEMENT ====================
     
@@ -686,71 +616,28 @@ class MCPTools:
         # Use new components
         await self.server_manager.initialize_servers()
         self.available_tools = await self.tool_discovery.discover_all_tools()
-        
-        # Maintain backwards compatibility
-        self.servers = self.server_manager.get_servers()
+        self._index_tools()
     
-    async def _initialize_server(self, name: str, config: dict):
-        """Initialize a single MCP server."""
-        server_type = config.get("type", "local")
-        
-        if server_type == "local":
-            # Local server - import the module
-            script_path = config.get("script_path", "server.py")
-            self.servers[name] = {
-                "type": "local",
-                "config": config,
-                "script_path": script_path
-            }
-            print(f"✅ Initialized local server: {name}")
-            
-        elif server_type == "remote":
-            # Remote server - HTTP connection
-            url = config.get("url")
-            if url:
-                self.servers[name] = {
-                    "type": "remote", 
-                    "config": config,
-                    "url": url
-                }
-                print(f"✅ Initialized remote server: {name}")
-            else:
-                print(f"⚠️  Remote server '{name}' missing URL")
-                
-        elif server_type == "subprocess":
-            # Subprocess server - spawn process
-            command = config.get("command")
-            args = config.get("args", [])
-            if command:
-                self.servers[name] = {
-                    "type": "subprocess",
-                    "config": config,
-                    "command": command,
-                    "args": args
-                }
-                print(f"✅ Initialized subprocess server: {name}")
-            else:
-                print(f"⚠️  Subprocess server '{name}' missing command")
+    async def shutdown(self):
+        """Shut down all persistent server processes."""
+        await self.server_manager.shutdown()
+    
+    def _index_tools(self):
+        """Rebuild the name lookup and per-server grouping after available_tools changes."""
+        # Reversed so the first tool with a given name wins, as the old linear scan did
+        self._tool_index = {tool["name"]: tool for tool in reversed(self.available_tools)}
+        self._tools_by_server = {}
+        for tool in self.available_tools:
+            self._tools_by_server.setdefault(tool.get("server", "unknown"), []).append(tool)
+        self._tools_desc_cache = None
     
     # ==================== TOOL DISCOVERY ====================
     
     async def _discover_all_tools(self):
         """Discover tools from all initialized servers."""
-        self.available_tools = []
-        
-        for server_name, server_info in self.servers.items():
-            try:
-                tools = await self._discover_server_tools(server_name, server_info)
-                for tool in tools:
-                    # Prefix tool names with server name to avoid conflicts
-                    tool["server"] = server_name
-                    tool["name"] = f"{server_name}_{tool['name']}"
-                    self.available_tools.append(tool)
-                    
-                print(f"📋 Discovered {len(tools)} tools from server '{server_name}'")
-                
-            except Exception as e:
-                print(f"⚠️  Error discovering tools from server '{server_name}': {e}")
+        # ToolDiscovery already queries every server concurrently
+        self.available_tools = await self.tool_discovery.discover_all_tools()
+        self._index_tools()
     
     async def _discover_server_tools(self, server_name: str, server_info: dict) -> list:
         """Discover tools from a specific server."""
@@ -771,20 +658,27 @@ class MCPTools:
             script_path = server_info["script_path"]
             
             # Import the server module
-            import sys
-            import os
             import importlib.util
             
-            # Add current directory to path if not already there
+            # Add current directory to path once; the set avoids scanning sys.path each time
             current_dir = os.getcwd()
-            if current_dir not in sys.path:
-                sys.path.insert(0, current_dir)
+            if current_dir not in self._sys_path_dirs:
+                if current_dir not in sys.path:
+                    sys.path.insert(0, current_dir)
+                self._sys_path_dirs.add(current_dir)
             
-            # Import the module
-            module_name = script_path.replace('.py', '').replace('/', '.')
-            spec = importlib.util.spec_from_file_location(module_name, script_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+            # Re-executing the script re-registers every tool, so reuse it until the file changes
+            cache_key = os.path.abspath(script_path)
+            mtime = os.path.getmtime(script_path)
+            cached = self._module_cache.get(cache_key)
+            if cached and cached[0] == mtime:
+                module = cached[1]
+            else:
+                module_name = script_path.replace('.py', '').replace('/', '.')
+                spec = importlib.util.spec_from_file_location(module_name, script_path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                self._module_cache[cache_key] = (mtime, module)
             
             # Get the FastMCP instance
             if hasattr(module, 'mcp'):
@@ -798,7 +692,10 @@ class MCPTools:
                         "name": tool_name,
                         "description": getattr(tool_obj, 'description', tool_name),
                         "parameters": self._extract_tool_parameters(tool_obj),
-                        "tool_obj": tool_obj  # Store reference for calling
+                        "tool_obj": tool_obj,  # Store reference for calling
+                        # Resolved once here so each call skips hasattr/iscoroutinefunction
+                        "_fn": getattr(tool_obj, 'fn', None),
+                        "_is_coro": asyncio.iscoroutinefunction(getattr(tool_obj, 'fn', None))
                     }
                     tools.append(tool_info)
                 
@@ -819,113 +716,7 @@ class MCPTools:
     
     async def _discover_subprocess_tools(self, server_info: dict) -> list:
         """Discover tools from a subprocess MCP server."""
-        try:
-            command = server_info.get("command")
-            args = server_info.get("args", [])
-            cwd = server_info.get("cwd", ".")
-            env = server_info.get("env", {})
-            
-            if not command:
-                print(f"⚠️  No command specified for subprocess server")
-                return []
-            
-            # Start the MCP server process
-            full_env = dict(os.environ)
-            full_env.update(env)
-            
-            # Create the subprocess
-            process = await asyncio.create_subprocess_exec(
-                command, *args,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=cwd,
-                env=full_env
-            )
-            
-            # Send initialize request to get tools
-            initialize_request = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {},
-                    "clientInfo": {
-                        "name": "ollama-mcp-client",
-                        "version": "1.0.0"
-                    }
-                }
-            }
-            
-            request_json = json.dumps(initialize_request) + "\n"
-            process.stdin.write(request_json.encode())
-            await process.stdin.drain()
-            
-            # Read the response
-            response_line = await process.stdout.readline()
-            if response_line:
-                try:
-                    response = json.loads(response_line.decode().strip())
-                    if "result" in response:
-                        # Send initialized notification
-                        initialized_notification = {
-                            "jsonrpc": "2.0",
-                            "method": "notifications/initialized",
-                            "params": {}
-                        }
-                        
-                        notification_json = json.dumps(initialized_notification) + "\n"
-                        process.stdin.write(notification_json.encode())
-                        await process.stdin.drain()
-                        
-                        # Small delay to let server process notification
-                        await asyncio.sleep(0.1)
-                        
-                        # Server initialized, now get tools
-                        tools_request = {
-                            "jsonrpc": "2.0",
-                            "id": 2,
-                            "method": "tools/list",
-                            "params": {}
-                        }
-                        
-                        request_json = json.dumps(tools_request) + "\n"
-                        process.stdin.write(request_json.encode())
-                        await process.stdin.drain()
-                        
-                        # Read tools response
-                        tools_response_line = await process.stdout.readline()
-                        if tools_response_line:
-                            tools_response = json.loads(tools_response_line.decode().strip())
-                            if "result" in tools_response and "tools" in tools_response["result"]:
-                                tools = []
-                                for tool_data in tools_response["result"]["tools"]:
-                                    tool_info = {
-                                        "name": tool_data.get("name", ""),
-                                        "description": tool_data.get("description", ""),
-                                        "parameters": tool_data.get("inputSchema", {}).get("properties", {}),
-                                        "subprocess_info": server_info,  # Store for later calling
-                                        "tool_schema": tool_data  # Store original schema
-                                    }
-                                    tools.append(tool_info)
-                                
-                                # Terminate the process
-                                process.stdin.close()
-                                await process.wait()
-                                
-                                return tools
-                except json.JSONDecodeError as e:
-                    print(f"⚠️  Error parsing MCP server response: {e}")
-            
-            # Clean up process
-            process.stdin.close()
-            await process.wait()
-            return []
-            
-        except Exception as e:
-            print(f"⚠️  Error discovering subprocess tools: {e}")
-            return []
+        return await self.tool_discovery._discover_subprocess_tools(server_info)
     
     def _extract_tool_parameters(self, tool_obj) -> dict:
         """Extract parameter schema from a tool object."""
@@ -938,26 +729,11 @@ class MCPTools:
                 elif isinstance(schema, dict):
                     return schema.get('properties', {})
             
-            # Fallback to function inspection
-            import inspect
+            # Fallback to function inspection, shared with the package's discovery
             if hasattr(tool_obj, 'fn'):
-                sig = inspect.signature(tool_obj.fn)
-                params = {}
-                for param_name, param in sig.parameters.items():
-                    param_type = "string"
-                    if param.annotation != inspect.Parameter.empty:
-                        if param.annotation == int:
-                            param_type = "integer"
-                        elif param.annotation == float:
-                            param_type = "number"
-                        elif param.annotation == bool:
-                            param_type = "boolean"
-                    
-                    params[param_name] = {
-                        "type": param_type,
-                        "description": f"{param_name} parameter",
-                        "required": param.default == inspect.Parameter.empty
-                    }
+                params = function_parameters(tool_obj.fn)
+                for param_name, param_info in params.items():
+                    param_info["description"] = f"{param_name} parameter"
                 return params
             
             return {}
@@ -972,12 +748,7 @@ class MCPTools:
         """Call an MCP tool from any configured server."""
         try:
             # Find the tool in our available tools
-            tool_info = None
-            for tool in self.available_tools:
-                if tool["name"] == tool_name:
-                    tool_info = tool
-                    break
-            
+            tool_info = self._tool_index.get(tool_name)
             if not tool_info:
                 return f"Tool '{tool_name}' not found in any configured server"
             
@@ -1003,19 +774,15 @@ class MCPTools:
     async def _call_local_tool(self, tool_info: dict, arguments: dict) -> str:
         """Call a tool from a local MCP server."""
         try:
-            tool_obj = tool_info.get("tool_obj")
-            if not tool_obj:
+            if not tool_info.get("tool_obj"):
                 return f"Tool object not found for {tool_info['name']}"
             
-            # Call the tool's function
-            if hasattr(tool_obj, 'fn'):
-                if asyncio.iscoroutinefunction(tool_obj.fn):
-                    result = await tool_obj.fn(**arguments)
-                else:
-                    result = tool_obj.fn(**arguments)
-                return str(result)
-            else:
+            # Call the tool's function, resolved at discovery
+            fn = tool_info.get("_fn")
+            if fn is None:
                 return f"Tool function not found for {tool_info['name']}"
+            result = await fn(**arguments) if tool_info["_is_coro"] else fn(**arguments)
+            return str(result)
                 
         except Exception as e:
             return f"Error calling local tool: {e}"
@@ -1028,12 +795,8 @@ class MCPTools:
     async def _call_subprocess_tool(self, tool_info: dict, arguments: dict, server_info: dict) -> str:
         """Call a tool from a subprocess MCP server."""
         try:
-            command = server_info.get("command")
-            args = server_info.get("args", [])
-            cwd = server_info.get("cwd", ".")
-            env = server_info.get("env", {})
-            
-            if not command:
+            session = server_info.get("session")
+            if not session:
                 return f"No command specified for subprocess server"
             
             # Get the original tool name (without server prefix)
@@ -1048,115 +811,35 @@ class MCPTools:
                 parts = tool_name_with_prefix.split("_", 1)
                 original_tool_name = parts[1] if len(parts) > 1 else parts[0]
             
-            # Start the MCP server process
-            full_env = dict(os.environ)
-            full_env.update(env)
+            # The persistent session respawns and re-handshakes a crashed server on its own
+            tool_response = await session.request("tools/call", {
+                "name": original_tool_name,
+                "arguments": arguments
+            })
             
-            process = await asyncio.create_subprocess_exec(
-                command, *args,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=cwd,
-                env=full_env
-            )
+            if "error" in tool_response:
+                return f"Tool execution error: {tool_response['error']}"
             
-            try:
-                # Initialize the server
-                initialize_request = {
-                    "jsonrpc": "2.0",
-                    "id": 1,
-                    "method": "initialize",
-                    "params": {
-                        "protocolVersion": "2024-11-05",
-                        "capabilities": {},
-                        "clientInfo": {
-                            "name": "ollama-mcp-client",
-                            "version": "1.0.0"
-                        }
-                    }
-                }
+            if "result" in tool_response:
+                result = tool_response["result"]
                 
-                request_json = json.dumps(initialize_request) + "\n"
-                process.stdin.write(request_json.encode())
-                await process.stdin.drain()
-                
-                # Read initialize response
-                response_line = await process.stdout.readline()
-                if not response_line:
-                    return "Failed to initialize MCP server"
-                
-                init_response = json.loads(response_line.decode().strip())
-                if "error" in init_response:
-                    return f"MCP server initialization error: {init_response['error']}"
-                
-                # Send initialized notification
-                initialized_notification = {
-                    "jsonrpc": "2.0",
-                    "method": "notifications/initialized",
-                    "params": {}
-                }
-                
-                notification_json = json.dumps(initialized_notification) + "\n"
-                process.stdin.write(notification_json.encode())
-                await process.stdin.drain()
-                
-                # Small delay to let server process notification
-                await asyncio.sleep(0.1)
-                
-                # Call the tool
-                tool_request = {
-                    "jsonrpc": "2.0",
-                    "id": 2,
-                    "method": "tools/call",
-                    "params": {
-                        "name": original_tool_name,
-                        "arguments": arguments
-                    }
-                }
-                
-                request_json = json.dumps(tool_request) + "\n"
-                process.stdin.write(request_json.encode())
-                await process.stdin.drain()
-                
-                # Read tool response
-                tool_response_line = await process.stdout.readline()
-                if tool_response_line:
-                    tool_response = json.loads(tool_response_line.decode().strip())
-                    
-                    if "error" in tool_response:
-                        return f"Tool execution error: {tool_response['error']}"
-                    
-                    if "result" in tool_response:
-                        result = tool_response["result"]
-                        
-                        # Handle different result formats
-                        if isinstance(result, dict):
-                            if "content" in result:
-                                # MCP standard format
-                                content = result["content"]
-                                if isinstance(content, list) and len(content) > 0:
-                                    return content[0].get("text", str(result))
-                                else:
-                                    return str(content)
-                            else:
-                                # Direct result
-                                return str(result)
+                # Handle different result formats
+                if isinstance(result, dict):
+                    if "content" in result:
+                        # MCP standard format
+                        content = result["content"]
+                        if isinstance(content, list) and len(content) > 0:
+                            return content[0].get("text", str(result))
                         else:
-                            return str(result)
-                    
-                    return "No result returned from tool"
+                            return str(content)
+                    else:
+                        # Direct result
+                        return str(result)
                 else:
-                    return "No response from MCP server"
-                    
-            finally:
-                # Clean up process
-                if process.stdin and not process.stdin.is_closing():
-                    process.stdin.close()
-                await process.wait()
+                    return str(result)
+            
+            return "No result returned from tool"
                 
-        except json.JSONDecodeError as e:
-            return f"Error parsing MCP response: {e}"
         except Exception as e:
             return f"Error calling subprocess tool: {e}"
     
@@ -1167,36 +850,22 @@ class MCPTools:
         if not self.available_tools:
             return "No MCP tools available."
         
-        # Group tools by server for better organization
-        servers = {}
-        for tool in self.available_tools:
-            server_name = tool.get("server", "unknown")
-            if server_name not in servers:
-                servers[server_name] = []
-            servers[server_name].append(tool)
+        # Built once per discovery; every chat turn reuses it
+        if self._tools_desc_cache is not None:
+            return self._tools_desc_cache
         
-        tools_desc = "You have access to these MCP tools:\n"
+        parts = ["You have access to these MCP tools:\n"]
         
-        for server_name, tools in servers.items():
+        for server_name, tools in self._tools_by_server.items():
             server_config = self.servers.get(server_name, {}).get("config", {})
             server_desc = server_config.get("description", f"Server: {server_name}")
-            tools_desc += f"\n📡 {server_desc}:\n"
+            parts.append(f"\n📡 {server_desc}:\n")
             
-            for tool in tools:
-                original_name = tool["name"].replace(f"{server_name}_", "")
-                tools_desc += f"  - {tool['name']}: {tool['description']}\n"
-                
-                if tool['parameters']:
-                    params = []
-                    for param_name, param_info in tool['parameters'].items():
-                        param_type = param_info.get('type', 'string')
-                        required = " (required)" if param_info.get('required', False) else ""
-                        params.append(f"{param_name} ({param_type}){required}")
-                    if params:
-                        tools_desc += f"    Parameters: {', '.join(params)}\n"
+            parts.extend(format_tool_entry(tool, tool['name'], tool['description']) for tool in tools)
         
-        tools_desc += "\n\nTo use a tool, include: [TOOL:tool_name:{\"param\":\"value\"}]"
-        return tools_desc
+        parts.append("\n\nTo use a tool, include: [TOOL:tool_name:{\"param\":\"value\"}]")
+        self._tools_desc_cache = "".join(parts)
+        return self._tools_desc_cache
     
     def list_servers(self) -> dict:
         """Get information about configured servers."""
@@ -1204,7 +873,7 @@ class MCPTools:
             name: {
                 "type": info["type"],
                 "description": info.get("config", {}).get("description", ""),
-                "tools_count": len([t for t in self.available_tools if t.get("server") == name])
+                "tools_count": len(self._tools_by_server.get(name, ()))
             }
             for name, info in self.servers.items()
         }
@@ -1264,7 +933,7 @@ async def main():
         
         # Initialize MCP tools from configuration
         print("🔧 Loading MCP tools from configuration...")
-        use_tools = input("\n🤔 Enable MCP tools? (y/n, default: y): ").strip().lower()
+        use_tools = (await ainput("\n🤔 Enable MCP tools? (y/n, default: y): ")).strip().lower()
         
         if use_tools in ['', 'y', 'yes']:
             mcp_tools = MCPTools()
@@ -1281,6 +950,8 @@ async def main():
                 client.set_mcp_tools(mcp_tools)
             else:
                 print("⚠️  No MCP tools available. Continuing without tools.")
+                # Discovery may already have spawned subprocess servers
+                await mcp_tools.shutdown()
                 mcp_tools = None
         else:
             print("🚫 MCP tools disabled for testing.")
@@ -1296,10 +967,12 @@ async def main():
                 print(f"   ... and {len(models) - 5} more")
         else:
             print("   ❌ No models found. Make sure Ollama is running.")
+            if mcp_tools:
+                await mcp_tools.shutdown()
             return
         
         # Get model choice
-        model_name = input(f"\n🤖 Choose model (default: {models[0] if models else 'llama2'}): ").strip()
+        model_name = (await ainput(f"\n🤖 Choose model (default: {models[0] if models else 'llama2'}): ")).strip()
         if not model_name:
             model_name = models[0] if models else 'llama2'
         
@@ -1313,11 +986,13 @@ async def main():
         print("-" * 60)
         
         streaming = True
+        # One indicator, restarted each turn
+        loading = LoadingIndicator("🤖 Assistant: ")
         
         try:
             while True:
                 # Get user input
-                user_input = input("\n👤 You: ").strip()
+                user_input = (await ainput("\n👤 You: ")).strip()
                 
                 if user_input.lower() in ['quit', 'exit']:
                     break
@@ -1353,11 +1028,10 @@ async def main():
                 
                 if streaming:
                     # Stream the response with loading indicator
-                    loading = LoadingIndicator("🤖 Assistant: ")
                     loading.start()
                     
+                    printer = BufferedPrinter()
                     try:
-                        response_parts = []
                         first_content = True
                         
                         async for chunk in client.chat_stream(model_name, user_input):
@@ -1369,19 +1043,19 @@ async def main():
                                 if first_content:
                                     loading.stop()
                                     first_content = False
-                                print(content, end="", flush=True)
-                                response_parts.append(content)
+                                printer.write(content)
                         
                         if first_content:  # No content was streamed
                             loading.stop()
                         
+                        printer.flush()
                         print()  # New line after streaming
                     except Exception as e:
+                        printer.flush()
                         loading.stop()
                         print(f"❌ Error during streaming: {e}")
                 else:
                     # Get non-streaming response with loading indicator
-                    loading = LoadingIndicator("🤖 Assistant: ")
                     loading.start()
                     
                     try:
@@ -1396,10 +1070,13 @@ async def main():
                         loading.stop()
                         print(f"❌ Error getting response: {e}")
                         
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
             print("\n\n👋 Goodbye!")
         except Exception as e:
             print(f"\n❌ Unexpected error: {e}")
+        finally:
+            if mcp_tools:
+                await mcp_tools.shutdown()
 
 
 if __name__ == "__main__":
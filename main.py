@@ -4,36 +4,53 @@ Main entry point for the Ollama MCP Client.
 Uses the new modular package structure.
 """
 
+import argparse
 import asyncio
 import sys
 from ollama_mcp_client import OllamaClient
+from ollama_mcp_client.utils import configure_logging
 from ollama_mcp_client.ui.interface import ChatInterface, setup_mcp_tools, select_model
 
 
-async def main():
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Ollama Chat Client with MCP Tools")
+    parser.add_argument("--refresh-tools", action="store_true",
+                        help="ignore the cached tool catalog and rediscover all tools")
+    return parser.parse_args()
+
+
+async def main(args):
     """Main function to run the interactive chat client."""
     try:
         print("🦙 Ollama Chat Client with MCP Tools")
         print("=" * 60)
         
-        async with OllamaClient() as client:
-            # Setup MCP tools
-            print("🔧 Setting up MCP tools...")
-            mcp_tools = await setup_mcp_tools()
+        client = OllamaClient()
+        mcp_tools = None
+        try:
+            async with client:
+                # Setup MCP tools
+                print("🔧 Setting up MCP tools...")
+                mcp_tools = await setup_mcp_tools(refresh_tools=args.refresh_tools)
+                if mcp_tools:
+                    client.set_mcp_tools(mcp_tools)
+                
+                # Select model
+                print("📋 Selecting model...")
+                model_name = await select_model(client)
+                if not model_name:
+                    print("❌ No model selected. Exiting.")
+                    return
+                
+                # Start chat interface
+                print("💬 Starting chat interface...")
+                chat_interface = ChatInterface(client, mcp_tools)
+                await chat_interface.start_chat(model_name)
+        finally:
             if mcp_tools:
-                client.set_mcp_tools(mcp_tools)
-            
-            # Select model
-            print("📋 Selecting model...")
-            model_name = await select_model(client)
-            if not model_name:
-                print("❌ No model selected. Exiting.")
-                return
-            
-            # Start chat interface
-            print("💬 Starting chat interface...")
-            chat_interface = ChatInterface(client, mcp_tools)
-            await chat_interface.start_chat(model_name)
+                await mcp_tools.shutdown()
+            await client.aclose()
             
     except Exception as e:
         print(f"❌ Error in main: {e}")
@@ -42,4 +59,6 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # The CLI shows the package's status messages on stdout; library users configure logging themselves
+    configure_logging()
+    asyncio.run(main(parse_args()))
\ No newline at end of file
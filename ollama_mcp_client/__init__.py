@@ -1,5 +1,10 @@
 """Ollama MCP Client - A modular client for chatting with Ollama models with MCP server integration."""
 
+import logging
+
+# Status and error messages go through logging; the application decides where they go
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
 # Core exports
 from .core import OllamaClient, LLMClient, OllamaHTTPClient, ToolIntegratedLLMClient
 
@@ -13,9 +13,13 @@ class OllamaClient:
         
         # Backwards compatibility attributes
         self.base_url = base_url.rstrip('/')
-        self.session = None
         self.mcp_tools = None
     
+    @property
+    def session(self):
+        """The HTTP session in use (owned by the HTTP client)."""
+        return self.http_client.session
+    
     async def __aenter__(self):
         await self.http_client.__aenter__()
         return self
@@ -23,6 +27,10 @@ class OllamaClient:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.http_client.__aexit__(exc_type, exc_val, exc_tb)
     
+    async def aclose(self):
+        """Close the shared HTTP session on application shutdown."""
+        await self.http_client.aclose()
+    
     async def list_models(self) -> list:
         """List all available models."""
         return await self.http_client.list_models()
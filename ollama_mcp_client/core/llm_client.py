@@ -1,10 +1,35 @@
 """LLM client implementations."""
 
+import asyncio
+import functools
 import json
+import logging
 import re
 import aiohttp
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Optional, List, Dict
+from ..utils.helpers import json_dumps, json_loads
+
+
+logger = logging.getLogger(__name__)
+
+# Custom tool call format: [TOOL:name:args]
+_TOOL_CALL_RE = re.compile(r'\[TOOL:([^:]+):([^\]]*)\]')
+
+# Request bodies are pre-serialized to bytes, so the content type is set explicitly
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Per-response read buffer for the shared Ollama session (aiohttp defaults to 64 KiB)
+_READ_BUFSIZE = 4 * 1024 * 1024
+
+# Consecutive content-less tool streams before a model goes straight to non-streaming
+_EMPTY_STREAMS_LIMIT = 3
+
+
+@functools.lru_cache(maxsize=32)
+def _combine_system_prompt(system_prompt: str, tools_desc: str) -> str:
+    """Append the tools description to a user system prompt."""
+    return f"{system_prompt}\n\n{tools_desc}".strip()
 
 
 class LLMClient(ABC):
@@ -29,94 +54,144 @@ class LLMClient(ABC):
 class OllamaHTTPClient(LLMClient):
     """Pure HTTP client for Ollama API without tool integration."""
     
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    # Process-wide session so every client reuses pooled keep-alive sockets
+    _shared: Optional[aiohttp.ClientSession] = None
+    
+    @classmethod
+    def get_shared_session(cls) -> aiohttp.ClientSession:
+        """Get the shared Ollama session, creating it on first use."""
+        if cls._shared is None or cls._shared.closed:
+            cls._shared = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=32,
+                    limit_per_host=16,
+                    keepalive_timeout=75,
+                    ttl_dns_cache=300
+                ),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=10),
+                # Larger read buffer means fewer reader wake-ups on fast token streams
+                read_bufsize=_READ_BUFSIZE
+            )
+        return cls._shared
+    
+    def __init__(self, base_url: str = "http://localhost:11434", session: Optional[aiohttp.ClientSession] = None):
         self.base_url = base_url.rstrip('/')
-        self.session = None
+        self.session = session
+        # A caller-provided session belongs to the caller and is never closed here
+        self._owns_session = False
+        # Reusable request skeletons, keyed by the stream flag
+        self._payloads = {
+            False: {"model": None, "messages": [], "stream": False},
+            True: {"model": None, "messages": [], "stream": True}
+        }
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        if self.session is None or self.session.closed:
+            self.session = self.get_shared_session()
+            self._owns_session = True
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        # The session outlives the context so later calls reuse its connections
+        pass
+    
+    async def aclose(self):
+        """Close the HTTP session this client opened on application shutdown; injected sessions are left open."""
+        if self._owns_session and self.session and not self.session.closed:
             await self.session.close()
+        self.session = None
+        self._owns_session = False
+    
+    def _encode_payload(self, stream: bool, model: str, message: str, system_prompt: Optional[str], tools: Optional[list]) -> bytes:
+        """Fill the reusable chat skeleton and serialize it to a request body."""
+        # Serialized before any await, so concurrent requests never see each other's fields
+        payload = self._payloads[stream]
+        payload["model"] = model
+        messages = payload["messages"]
+        messages.clear()
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": message})
+        if tools:
+            payload["tools"] = tools
+        else:
+            payload.pop("tools", None)
+        return json_dumps(payload)
     
     async def list_models(self) -> list:
         """List all available models."""
         try:
             async with self.session.get(f"{self.base_url}/api/tags") as response:
                 response.raise_for_status()
-                data = await response.json()
+                data = json_loads(await response.read())
                 return [model['name'] for model in data.get('models', [])]
         except aiohttp.ClientError as e:
-            print(f"Error connecting to Ollama server: {e}")
+            logger.error("Error connecting to Ollama server: %s", e)
             return []
         except json.JSONDecodeError:
-            print("Error parsing response from Ollama server")
+            logger.error("Error parsing response from Ollama server")
             return []
     
     async def chat(self, model: str, message: str, system_prompt: Optional[str] = None, tools: Optional[list] = None) -> Optional[dict]:
         """Send a chat message and get response."""
         try:
-            payload = {
-                "model": model,
-                "messages": [],
-                "stream": False
-            }
-            
-            if system_prompt:
-                payload["messages"].append({"role": "system", "content": system_prompt})
-            
-            payload["messages"].append({"role": "user", "content": message})
-            
-            if tools:
-                payload["tools"] = tools
-            
-            async with self.session.post(f"{self.base_url}/api/chat", json=payload) as response:
+            body = self._encode_payload(False, model, message, system_prompt, tools)
+            async with self.session.post(f"{self.base_url}/api/chat", data=body, headers=_JSON_HEADERS) as response:
                 response.raise_for_status()
-                return await response.json()
+                return json_loads(await response.read())
                 
         except aiohttp.ClientError as e:
-            print(f"Error communicating with Ollama: {e}")
+            logger.error("Error communicating with Ollama: %s", e)
             return None
         except json.JSONDecodeError:
-            print("Error parsing response from Ollama")
+            logger.error("Error parsing response from Ollama")
             return None
     
     async def chat_stream(self, model: str, message: str, system_prompt: Optional[str] = None, tools: Optional[list] = None):
         """Send a chat message and get streaming response."""
         try:
-            payload = {
-                "model": model, 
-                "messages": [],
-                "stream": True
-            }
-            
-            if system_prompt:
-                payload["messages"].append({"role": "system", "content": system_prompt})
-            
-            payload["messages"].append({"role": "user", "content": message})
-            
-            if tools:
-                payload["tools"] = tools
-            
-            async with self.session.post(f"{self.base_url}/api/chat", json=payload) as response:
+            body = self._encode_payload(True, model, message, system_prompt, tools)
+            async with self.session.post(f"{self.base_url}/api/chat", data=body, headers=_JSON_HEADERS) as response:
                 response.raise_for_status()
                 
-                async for line in response.content:
-                    if line:
-                        try:
-                            chunk = json.loads(line.decode().strip())
-                            yield chunk
-                        except json.JSONDecodeError:
-                            continue
+                # NDJSON: buffer raw bytes and parse each complete line in place, without copying it out
+                buffer = bytearray()
+                async for data in response.content.iter_any():
+                    buffer.extend(data)
+                    start = 0
+                    with memoryview(buffer) as view:
+                        newline = buffer.find(b"\n")
+                        while newline != -1:
+                            chunk = self._parse_stream_line(view[start:newline])
+                            start = newline + 1
+                            if chunk is not None:
+                                yield chunk
+                            newline = buffer.find(b"\n", start)
+                    # Compact once per read rather than once per line
+                    del buffer[:start]
+                
+                # Final line may arrive without a trailing newline
+                chunk = self._parse_stream_line(buffer)
+                if chunk is not None:
+                    yield chunk
                             
         except aiohttp.ClientError as e:
-            print(f"Error communicating with Ollama: {e}")
+            logger.error("Error communicating with Ollama: %s", e)
             return
         except Exception as e:
-            print(f"Unexpected error during streaming: {e}")
+            logger.error("Unexpected error during streaming: %s", e)
             return
+    
+    @staticmethod
+    def _parse_stream_line(line) -> Optional[dict]:
+        """Parse one NDJSON line from a bytes-like view, skipping blank or malformed lines."""
+        if not line:
+            return None
+        try:
+            return json_loads(line)
+        except json.JSONDecodeError:
+            # Also covers whitespace-only lines
+            return None
 
 
 class ToolIntegratedLLMClient:
@@ -124,20 +199,59 @@ class ToolIntegratedLLMClient:
     
     def __init__(self, llm_client: LLMClient, mcp_tools=None):
         self.llm_client = llm_client
-        self.mcp_tools = mcp_tools
+        # Whether a model streams content with tools: True once it has, False after repeated empty streams
+        self._stream_tools_supported: Dict[str, bool] = {}
+        self._empty_streams: Dict[str, int] = {}
+        self.set_mcp_tools(mcp_tools)
+    
+    def _record_stream_outcome(self, model: str, content_received: bool):
+        """Track streaming support; a single empty turn (native tool_calls, blank answer) never downgrades."""
+        if content_received:
+            self._stream_tools_supported[model] = True
+            self._empty_streams.pop(model, None)
+        elif self._stream_tools_supported.get(model) is not True:
+            self._empty_streams[model] = self._empty_streams.get(model, 0) + 1
+            if self._empty_streams[model] >= _EMPTY_STREAMS_LIMIT:
+                self._stream_tools_supported[model] = False
     
     def set_mcp_tools(self, mcp_tools):
         """Set the MCP tools client."""
         self.mcp_tools = mcp_tools
+        self._refresh_tools_description()
+    
+    def _refresh_tools_description(self):
+        """Render the tools description once for the current tool set."""
+        if self.mcp_tools:
+            self._tools_desc_source = self._tools_state()
+            self._tools_desc_cache = self.mcp_tools.get_tools_description()
+        else:
+            self._tools_desc_source = None
+            self._tools_desc_cache = ""
+    
+    def _tools_state(self) -> tuple:
+        """Identify the current tool set: the list object plus the tools version, when exposed."""
+        return (self.mcp_tools.available_tools, getattr(self.mcp_tools, "tools_version", None))
+    
+    def _build_system_prompt(self, system_prompt: Optional[str]) -> str:
+        """Get the system prompt with the cached tools description appended."""
+        tools, version = self._tools_state()
+        source = self._tools_desc_source
+        # A rediscovered or re-indexed tool set is the only thing that invalidates the cache
+        if source is None or source[0] is not tools or source[1] != version:
+            self._refresh_tools_description()
+        return _combine_system_prompt(system_prompt or "", self._tools_desc_cache)
     
     async def chat(self, model: str, message: str, system_prompt: Optional[str] = None) -> Optional[str]:
         """Send a chat message with tool integration."""
         # Build system prompt with tools if available
         full_system_prompt = system_prompt or ""
         if self.mcp_tools:
-            tools_desc = self.mcp_tools.get_tools_description()
-            full_system_prompt = f"{full_system_prompt}\n\n{tools_desc}".strip()
+            full_system_prompt = self._build_system_prompt(system_prompt)
         
+        return await self._chat_with_prompt(model, message, full_system_prompt)
+    
+    async def _chat_with_prompt(self, model: str, message: str, full_system_prompt: str) -> Optional[str]:
+        """Run a non-streaming chat with an already built system prompt and execute its tool calls."""
         # Get response from LLM
         response = await self.llm_client.chat(model, message, full_system_prompt)
         if not response:
@@ -150,41 +264,45 @@ class ToolIntegratedLLMClient:
         """Send a chat message with tool integration and streaming."""
         # For streaming mode, use a hybrid approach due to model compatibility issues
         if self.mcp_tools:
-            # Try streaming first, but if it fails fall back to non-streaming
-            full_system_prompt = system_prompt or ""
-            tools_desc = self.mcp_tools.get_tools_description()
-            full_system_prompt = f"{full_system_prompt}\n\n{tools_desc}".strip()
+            full_system_prompt = self._build_system_prompt(system_prompt)
+            
+            # A model that keeps streaming nothing with tools goes straight to non-streaming
+            if self._stream_tools_supported.get(model) is False:
+                response = await self._chat_with_prompt(model, message, full_system_prompt)
+                if response:
+                    yield {"message": {"content": response}, "done": False}
+                yield {"done": True}
+                return
             
-            # Test if the model can handle tool descriptions in streaming mode
-            accumulated_text = ""
+            # Try streaming first, but if it fails fall back to non-streaming
             content_received = False
             
             try:
                 async for chunk in self.llm_client.chat_stream(model, message, full_system_prompt):
-                    if chunk.get("done", False):
+                    # Unpack the chunk once; this is the per-token loop
+                    if chunk.get("done"):
+                        self._record_stream_outcome(model, content_received)
                         # If we got no content, the model can't handle tools in streaming mode
                         if not content_received:
-                            # Fall back to non-streaming mode with tools
-                            response = await self.chat(model, message, system_prompt)
+                            # Fall back to non-streaming mode with tools, reusing the prompt
+                            response = await self._chat_with_prompt(model, message, full_system_prompt)
                             if response:
                                 yield {"message": {"content": response}, "done": False}
                         yield chunk
                         return
                     
-                    # Handle content streaming
-                    message_data = chunk.get("message", {})
-                    if "content" in message_data:
-                        content = message_data["content"]
-                        if content:
-                            content_received = True
-                            accumulated_text += content
-                            yield chunk
-                    else:
+                    # Handle content streaming; chunks with an empty content field are dropped
+                    message_data = chunk.get("message")
+                    content = message_data.get("content") if message_data else None
+                    if content:
+                        content_received = True
+                        yield chunk
+                    elif content is None:
                         yield chunk
                         
             except Exception as e:
                 # If streaming fails, fall back to non-streaming
-                response = await self.chat(model, message, system_prompt)
+                response = await self._chat_with_prompt(model, message, full_system_prompt)
                 if response:
                     yield {"message": {"content": response}, "done": False}
                 yield {"done": True}
@@ -196,55 +314,59 @@ class ToolIntegratedLLMClient:
     async def _process_response_with_tools(self, response: dict) -> Optional[str]:
         """Process LLM response and execute any tool calls."""
         message = response.get("message", {})
-        content = message.get("content", "")
         
-        # Handle Ollama native tool calls
-        if "tool_calls" in message:
-            tool_calls = message["tool_calls"]
-            if tool_calls:
-                tool_results = await self._execute_tool_calls(tool_calls)
-                return self._format_tool_results(tool_results)
+        # Handle Ollama native tool calls; the custom format is never mixed in
+        tool_calls = message.get("tool_calls")
+        if tool_calls:
+            return self._format_tool_results(await self._execute_tool_calls(tool_calls))
         
         # Handle custom tool call format [TOOL:name:args]
-        processed_content = await self._process_tool_calls_async(content)
-        return processed_content
+        content = message.get("content", "")
+        if not content:
+            return ""
+        if "[TOOL:" not in content:
+            return content
+        return await self._process_tool_calls_async(content)
     
     async def _execute_tool_calls(self, tool_calls: list, debug: bool = False) -> list:
-        """Execute a list of tool calls."""
+        """Execute a list of tool calls concurrently, keeping results in call order."""
         if not self.mcp_tools:
             return [{"error": "No MCP tools available"}]
         
-        results = []
-        for tool_call in tool_calls:
-            try:
-                # Handle both Ollama native format and our custom format
-                if isinstance(tool_call, dict):
-                    if "function" in tool_call:
-                        # Ollama native format
-                        func_info = tool_call["function"]
-                        tool_name = func_info.get("name", "").replace("tool.", "")
-                        arguments = func_info.get("arguments", {})
-                    else:
-                        # Custom format
-                        tool_name = tool_call.get("name", "")
-                        arguments = tool_call.get("arguments", {})
+        results = await asyncio.gather(
+            *(self._execute_tool_call(tool_call, debug) for tool_call in tool_calls)
+        )
+        return [result for result in results if result is not None]
+    
+    async def _execute_tool_call(self, tool_call, debug: bool = False) -> Optional[dict]:
+        """Execute a single tool call; returns None for unrecognized entries."""
+        try:
+            # Handle both Ollama native format and our custom format
+            if isinstance(tool_call, dict):
+                if "function" in tool_call:
+                    # Ollama native format
+                    func_info = tool_call["function"]
+                    tool_name = func_info.get("name", "").replace("tool.", "")
+                    arguments = func_info.get("arguments", {})
                 else:
-                    # Fallback
-                    continue
-                
-                if debug:
-                    print(f"🔧 Executing tool: {tool_name} with args: {arguments}")
-                
-                result = await self.mcp_tools.call_tool(tool_name, arguments)
-                results.append({"tool": tool_name, "result": result})
-                
-            except Exception as e:
-                error_msg = f"Error executing tool {tool_call}: {e}"
-                if debug:
-                    print(f"❌ {error_msg}")
-                results.append({"tool": str(tool_call), "error": error_msg})
-        
-        return results
+                    # Custom format
+                    tool_name = tool_call.get("name", "")
+                    arguments = tool_call.get("arguments", {})
+            else:
+                # Fallback
+                return None
+            
+            if debug:
+                print(f"🔧 Executing tool: {tool_name} with args: {arguments}")
+            
+            result = await self.mcp_tools.call_tool(tool_name, arguments)
+            return {"tool": tool_name, "result": result}
+            
+        except Exception as e:
+            error_msg = f"Error executing tool {tool_call}: {e}"
+            if debug:
+                print(f"❌ {error_msg}")
+            return {"tool": str(tool_call), "error": error_msg}
     
     def _format_tool_results(self, results: list, for_streaming: bool = False) -> str:
         """Format tool execution results for display."""
@@ -269,34 +391,47 @@ class ToolIntegratedLLMClient:
     
     async def _process_tool_calls_async(self, text: str) -> str:
         """Process custom tool call format [TOOL:name:args] in text with proper async execution."""
-        # Pattern to match [TOOL:name:args]
-        pattern = r'\[TOOL:([^:]+):([^\]]*)\]'
-        matches = re.findall(pattern, text)
+        # Cheap substring check keeps the regex off the common no-tool path
+        if "[TOOL:" not in text:
+            return text
+        
+        matches = list(_TOOL_CALL_RE.finditer(text))
         
         if not matches:
             return text
         
-        # Process each tool call found
-        result_text = text
-        for tool_name, args_str in matches:
+        # Parse every marker first, then submit the well-formed ones as one batch
+        replacements = [None] * len(matches)
+        calls = []
+        call_slots = []
+        for i, match in enumerate(matches):
+            tool_name, args_str = match.group(1), match.group(2)
+            if not self.mcp_tools:
+                replacements[i] = f"❌ No MCP tools available for {tool_name}"
+                continue
             try:
-                arguments = json.loads(args_str) if args_str.strip() else {}
-                if self.mcp_tools:
-                    tool_result = await self.mcp_tools.call_tool(tool_name, arguments)
-                    replacement = f"🔧 {tool_name}: {tool_result}"
-                else:
-                    replacement = f"❌ No MCP tools available for {tool_name}"
-                    
-                # Replace the tool call with the result
-                tool_call_pattern = f"\\[TOOL:{re.escape(tool_name)}:{re.escape(args_str)}\\]"
-                result_text = re.sub(tool_call_pattern, replacement, result_text)
-                
+                arguments = json_loads(args_str) if args_str.strip() else {}
             except Exception as e:
-                replacement = f"❌ Error calling {tool_name}: {e}"
-                tool_call_pattern = f"\\[TOOL:{re.escape(tool_name)}:{re.escape(args_str)}\\]"
-                result_text = re.sub(tool_call_pattern, replacement, result_text)
+                replacements[i] = f"❌ Error calling {tool_name}: {e}"
+                continue
+            calls.append((tool_name, arguments))
+            call_slots.append(i)
+        
+        if calls:
+            results = await self.mcp_tools.call_tools_batch(calls)
+            for i, (tool_name, _), tool_result in zip(call_slots, calls, results):
+                replacements[i] = f"🔧 {tool_name}: {tool_result}"
+        
+        # Splice results in by match span
+        parts = []
+        last_end = 0
+        for match, replacement in zip(matches, replacements):
+            parts.append(text[last_end:match.start()])
+            parts.append(replacement)
+            last_end = match.end()
+        parts.append(text[last_end:])
         
-        return result_text
+        return "".join(parts)
     
     def _process_tool_calls(self, text: str) -> str:
         """Sync version for streaming - just returns text as-is."""
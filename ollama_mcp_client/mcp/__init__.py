@@ -2,14 +2,17 @@
 
 from .config import ConfigManager
 from .server_manager import ServerManager
-from .tool_discovery import ToolDiscovery
+from .session import MCPSession
+from .tool_discovery import ToolDiscovery, tool
 from .tool_executor import ToolExecutor
 from .tools import MCPTools
 
 __all__ = [
     'ConfigManager',
     'ServerManager', 
+    'MCPSession',
     'ToolDiscovery',
+    'tool',
     'ToolExecutor',
     'MCPTools'
 ]
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""On-disk cache of discovered tool catalogs."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, Any, Optional
+from .session import PROTOCOL_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Entries older than this are rediscovered even if nothing in the config changed
+_DEFAULT_TTL = 24 * 60 * 60
+
+
+def _default_cache_dir() -> str:
+    """Get the per-user cache directory for the client."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ollama_mcp_client")
+
+
+class CatalogCache:
+    """Persists tools/list results so unchanged servers skip cold discovery."""
+    
+    def __init__(self, servers_config: Dict[str, Any], cache_dir: Optional[str] = None, ttl: Optional[float] = None):
+        self.servers_config = servers_config
+        self.cache_dir = cache_dir or _default_cache_dir()
+        self.ttl = _DEFAULT_TTL if ttl is None else ttl
+        self.path = os.path.join(self.cache_dir, f"catalog_{self._cache_key()}.json")
+        # Entries last loaded or saved, stale ones included: server name -> entry
+        self._entries: Dict[str, dict] = {}
+        # Servers whose entry was within the TTL when loaded
+        self._fresh: set = set()
+        # HTTP validators captured during this discovery: server name -> {"etag", "last_modified"}
+        self._validators: Dict[str, dict] = {}
+    
+    def _cache_key(self) -> str:
+        """Hash the protocol version, server configs and the mtimes of any scripts they run."""
+        digest = hashlib.sha256(PROTOCOL_VERSION.encode() + b"|" + json.dumps(self.servers_config, sort_keys=True).encode())
+        for server_config in self.servers_config.values():
+            args = server_config.get("args", [])
+            command = server_config.get("command", "")
+            paths = list(command) if isinstance(command, list) else [command]
+            for path in paths + list(args):
+                path = os.path.join(server_config.get("cwd") or "", str(path))
+                if os.path.isfile(path):
+                    digest.update(b"|" + path.encode() + b"@" + str(os.stat(path).st_mtime_ns).encode())
+        return digest.hexdigest()
+    
+    def load(self) -> Optional[Dict[str, list]]:
+        """Load the tools of every server whose cached entry is still within the TTL, or None if nothing is usable."""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        servers = data.get("servers") if isinstance(data, dict) else None
+        if not isinstance(servers, dict):
+            return None
+        
+        # Each server expires on its own, so one stale entry does not force a full rediscovery.
+        # Stale entries are kept for their HTTP validators.
+        now = time.time()
+        self._entries = {
+            name: entry for name, entry in servers.items()
+            if isinstance(entry, dict) and isinstance(entry.get("tools"), list)
+        }
+        self._fresh = {name for name, entry in self._entries.items() if now - entry.get("saved_at", 0) < self.ttl}
+        self._validators = {}
+        return {name: self._entries[name]["tools"] for name in self._fresh} or None
+    
+    def conditional_headers(self, server_name: str) -> Dict[str, str]:
+        """Build If-None-Match/If-Modified-Since headers from a server's cached entry."""
+        entry = self._entries.get(server_name) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+    
+    def revalidated_tools(self, server_name: str) -> Optional[list]:
+        """Get the cached tools for a server whose 304 response confirmed them."""
+        entry = self._entries.get(server_name)
+        if entry is None:
+            return None
+        self._validators[server_name] = {"etag": entry.get("etag"), "last_modified": entry.get("last_modified")}
+        return entry["tools"]
+    
+    def set_validators(self, server_name: str, etag: Optional[str], last_modified: Optional[str]):
+        """Remember the validators of a fresh 200 response, saved with the server's next entry."""
+        self._validators[server_name] = {"etag": etag, "last_modified": last_modified}
+    
+    def clear(self):
+        """Delete the cache file and forget loaded entries, validators included."""
+        self._entries, self._fresh, self._validators = {}, set(), {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+    
+    def save(self, catalog: Dict[str, list]):
+        """Write the catalog atomically so a crash never leaves a partial file."""
+        # Reused fresh entries keep their timestamp, so reusing a cache never extends its TTL
+        now = time.time()
+        entries = {}
+        for name, tools in catalog.items():
+            previous = self._entries.get(name)
+            if name in self._fresh and previous.get("tools") == tools:
+                entries[name] = previous
+            else:
+                entries[name] = {"tools": tools, "saved_at": now}
+                validators = self._validators.get(name)
+                if validators:
+                    entries[name].update({key: value for key, value in validators.items() if value})
+        self._entries = entries
+        self._fresh = set(entries)
+        self._validators = {}
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({"servers": entries}, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning("⚠️ Could not write tool catalog cache: %s", e)
\ No newline at end of file
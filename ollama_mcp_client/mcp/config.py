@@ -1,14 +1,35 @@
 """Configuration management for MCP servers."""
 
+import copy
+import functools
 import json
+import logging
 import os
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Pattern: ${VAR} or ${VAR:default}
+_ENV_VAR_RE = re.compile(r'\$\{([^}:]+)(:([^}]*))?\}')
+
+# Files or directories that mark a project root
+_PROJECT_INDICATORS = frozenset({
+    'requirements.txt', 
+    'pyproject.toml', 
+    '.git',
+    'main.py',
+    'server.py'
+})
 
 
 class ConfigManager:
     """Handles configuration loading and validation."""
     
+    # Parsed configs shared across instances: abspath -> ((st_mtime_ns, st_size), config)
+    _cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+    
     def __init__(self, config_path: str = "config.json"):
         self.config_path = config_path
         self.config = self._load_config()
@@ -16,7 +37,7 @@ class ConfigManager:
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from JSON file."""
         if not os.path.exists(self.config_path):
-            print(f"⚠️ Configuration file '{self.config_path}' not found. Using defaults.")
+            logger.warning("⚠️ Configuration file '%s' not found. Using defaults.", self.config_path)
             return {
                 "mcp_servers": {},
                 "settings": {
@@ -26,20 +47,36 @@ class ConfigManager:
             }
         
         try:
+            # Reuse the parsed config while the file is unchanged
+            cache_key = os.path.abspath(self.config_path)
+            # Size catches same-timestamp rewrites on filesystems with coarse mtimes
+            st = os.stat(self.config_path)
+            signature = (st.st_mtime_ns, st.st_size)
+            cached = self._cache.get(cache_key)
+            if cached and cached[0] == signature:
+                return copy.deepcopy(cached[1])
+            
             with open(self.config_path, 'r') as f:
                 config_text = f.read()
                 # Replace environment variables
                 config_text = self._expand_environment_variables(config_text)
-                return json.loads(config_text)
+                config = json.loads(config_text)
+            
+            self._cache[cache_key] = (signature, config)
+            return copy.deepcopy(config)
         except json.JSONDecodeError as e:
-            print(f"❌ Error parsing config file: {e}")
+            logger.error("❌ Error parsing config file: %s", e)
             return {"mcp_servers": {}, "settings": {}}
         except Exception as e:
-            print(f"❌ Error loading config file: {e}")
+            logger.error("❌ Error loading config file: %s", e)
             return {"mcp_servers": {}, "settings": {}}
     
     def _expand_environment_variables(self, text: str) -> str:
         """Expand environment variables in config text."""
+        # Configs without placeholders skip the regex entirely
+        if "${" not in text:
+            return text
+        
         # Replace ${VAR} with environment variable values
         def replace_var(match):
             var_name = match.group(1)
@@ -47,32 +84,32 @@ class ConfigManager:
             
             # Special handling for PROJECT_ROOT
             if var_name == "PROJECT_ROOT":
-                return os.environ.get(var_name, self._get_project_root())
+                if var_name in os.environ:
+                    return os.environ[var_name]
+                return self.project_root
             
             return os.environ.get(var_name, default_value)
         
-        # Pattern: ${VAR} or ${VAR:default}
-        pattern = r'\$\{([^}:]+)(:([^}]*))?\}'
-        return re.sub(pattern, replace_var, text)
+        return _ENV_VAR_RE.sub(replace_var, text)
+    
+    @functools.cached_property
+    def project_root(self) -> str:
+        """Project root directory, detected once per instance."""
+        return self._get_project_root()
     
     def _get_project_root(self) -> str:
         """Auto-detect project root directory."""
         # Start from config file location and work upward
         current_dir = os.path.dirname(os.path.abspath(self.config_path))
         
-        # Look for common project indicators
-        project_indicators = [
-            'requirements.txt', 
-            'pyproject.toml', 
-            '.git',
-            'main.py',
-            'server.py'
-        ]
-        
         while current_dir != os.path.dirname(current_dir):  # Not at filesystem root
-            for indicator in project_indicators:
-                if os.path.exists(os.path.join(current_dir, indicator)):
-                    return current_dir
+            # One directory read per level instead of a stat per indicator
+            try:
+                with os.scandir(current_dir) as entries:
+                    if any(entry.name in _PROJECT_INDICATORS for entry in entries):
+                        return current_dir
+            except OSError:
+                pass
             current_dir = os.path.dirname(current_dir)
         
         # Fallback to current directory
@@ -1,10 +1,24 @@
 """MCP server lifecycle and management."""
 
-import subprocess
-import sys
-import importlib.util
-from typing import Dict, Any
+import aiohttp
+import asyncio
+import importlib
+import logging
+import os
+from types import ModuleType
+from typing import Dict, Any, Optional
+from .catalog import CatalogCache
 from .config import ConfigManager
+from .session import MCPSession
+
+
+logger = logging.getLogger(__name__)
+
+# Sockets shared by all remote servers
+_HTTP_POOL_LIMIT = 32
+
+# In-flight tool calls per server when the config sets no valid limit
+_DEFAULT_MAX_CONCURRENT_TOOLS = 5
 
 
 class ServerManager:
@@ -13,23 +27,48 @@ class ServerManager:
     def __init__(self, config_manager: ConfigManager):
         self.config_manager = config_manager
         self.servers = {}
+        self._cached_catalog = {}
+        self._tool_slots: Dict[str, asyncio.Semaphore] = {}
+        self._module_cache: Dict[str, ModuleType] = {}
+        # Tool name -> owning server, rebuilt after every discovery
+        self.tool_routes: Dict[str, str] = {}
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self.catalog_cache = CatalogCache(
+            config_manager.get_servers_config(),
+            ttl=config_manager.get_settings().get("tool_cache_ttl")
+        )
     
-    async def initialize_servers(self):
-        """Initialize all configured servers."""
+    async def initialize_servers(self, use_cache: bool = True):
+        """Initialize all configured servers, deferring spawns for servers with a cached catalog."""
         servers_config = self.config_manager.get_servers_config()
+        self._cached_catalog = (self.catalog_cache.load() or {}) if use_cache else {}
+        
+        # Re-initializing replaces every entry, so stop the sessions they hold first; none is orphaned
+        await self._close_sessions()
+        self.servers = {}
         
-        for server_name, server_config in servers_config.items():
-            await self._initialize_server(server_name, server_config)
+        # Spawns finish their pipe setup concurrently instead of one server at a time
+        await asyncio.gather(
+            *(self._initialize_server(server_name, server_config) for server_name, server_config in servers_config.items())
+        )
+        
+        # Keep servers in config order regardless of which finished first
+        self.servers = {name: self.servers[name] for name in servers_config if name in self.servers}
     
     async def _initialize_server(self, server_name: str, server_config: Dict[str, Any]):
         """Initialize a single server based on its type."""
         # Skip disabled servers
         if not server_config.get("enabled", True):
-            print(f"⏭️ Skipping disabled server: {server_name}")
+            logger.info("⏭️ Skipping disabled server: %s", server_name)
             return
             
         server_type = server_config.get("type")
         
+        # Bound in-flight tool calls per server; a server may lower or raise the global setting
+        self._tool_slots[server_name] = asyncio.Semaphore(self._tool_concurrency(server_name, server_config))
+        
+        cached_tools = self._cached_catalog.get(server_name) if server_type in ("subprocess", "remote") else None
+        
         if server_type == "subprocess":
             try:
                 # Build subprocess command
@@ -43,46 +82,52 @@ class ServerManager:
                 
                 # Get additional options
                 cwd = server_config.get("cwd", None)
-                env = server_config.get("env", None)
                 
-                process = subprocess.Popen(
+                # Overlay config env on the parent environment once per server
+                extra_env = server_config.get("env")
+                env = {**os.environ, **extra_env} if extra_env else None
+                
+                # Spawned once and kept alive for discovery and every tool call
+                session = MCPSession(
                     full_command,
-                    stdin=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    bufsize=0,
                     cwd=cwd,
-                    env=env
+                    env=env,
+                    timeout=self.config_manager.get_settings().get("tool_timeout", 30)
                 )
                 
                 self.servers[server_name] = {
                     "type": "subprocess",
-                    "process": process,
+                    "session": session,
                     "config": server_config
                 }
-                print(f"✅ Initialized subprocess server: {server_name}")
+                if cached_tools:
+                    # The catalog is known, so the process is only spawned by the first tools/call
+                    self.servers[server_name]["cached_tools"] = cached_tools
+                    logger.info("✅ Initialized subprocess server: %s (cached tools, starts on first call)", server_name)
+                else:
+                    await session.start()
+                    logger.info("✅ Initialized subprocess server: %s", server_name)
                 
             except Exception as e:
-                print(f"❌ Failed to initialize subprocess server '{server_name}': {e}")
+                logger.error("❌ Failed to initialize subprocess server '%s': %s", server_name, e)
                 
         elif server_type == "local":
             try:
                 # Import local module
                 module_path = server_config.get("module_path")
-                if module_path and importlib.util.find_spec(module_path):
-                    module = importlib.import_module(module_path)
+                module = self._import_local_module(module_path) if module_path else None
+                if module is not None:
                     self.servers[server_name] = {
                         "type": "local", 
                         "module": module,
                         "config": server_config
                     }
-                    print(f"✅ Initialized local server: {server_name}")
+                    logger.info("✅ Initialized local server: %s", server_name)
                 else:
-                    print(f"❌ Local module '{module_path}' not found for server '{server_name}'")
+                    logger.error("❌ Local module '%s' not found for server '%s'", module_path, server_name)
                     
             except Exception as e:
-                print(f"❌ Failed to initialize local server '{server_name}': {e}")
+                logger.error("❌ Failed to initialize local server '%s': %s", server_name, e)
                 
         elif server_type == "remote":
             # Remote servers are initialized on-demand
@@ -90,9 +135,84 @@ class ServerManager:
                 "type": "remote",
                 "config": server_config
             }
-            print(f"✅ Configured remote server: {server_name}")
+            if cached_tools:
+                self.servers[server_name]["cached_tools"] = cached_tools
+            logger.info("✅ Configured remote server: %s", server_name)
         else:
-            print(f"⚠️ Unknown server type '{server_type}' for server '{server_name}'")
+            logger.warning("⚠️ Unknown server type '%s' for server '%s'", server_type, server_name)
+    
+    def _import_local_module(self, module_path: str):
+        """Import a local server module once, shared by every server naming it; None if it does not exist."""
+        module = self._module_cache.get(module_path)
+        if module is None:
+            # A single import_module replaces a find_spec probe plus a second finder walk
+            try:
+                module = importlib.import_module(module_path)
+            except ModuleNotFoundError as e:
+                # Only a missing module_path itself means "not found"; a missing dependency is a real error
+                if e.name is None or not (module_path == e.name or module_path.startswith(e.name + ".")):
+                    raise
+                return None
+            self._module_cache[module_path] = module
+        return module
+    
+    def invalidate_cache(self):
+        """Drop the on-disk tool catalog so the next initialization rediscovers every server."""
+        try:
+            self.catalog_cache.clear()
+        except OSError as e:
+            logger.warning("⚠️ Could not remove tool catalog cache: %s", e)
+        self._cached_catalog = {}
+        for server_info in self.servers.values():
+            server_info.pop("cached_tools", None)
+    
+    async def _close_sessions(self):
+        """Close every subprocess session, concurrently."""
+        sessions = [server_info["session"] for server_info in self.servers.values() if server_info.get("session")]
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+    
+    async def shutdown(self):
+        """Stop all subprocess servers and close the remote HTTP session."""
+        await self._close_sessions()
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
+    
+    def http_session(self) -> aiohttp.ClientSession:
+        """Get the HTTP session shared by remote discovery and tool calls, creating it on first use."""
+        if self._http_session is None or self._http_session.closed:
+            # Tool slots bound calls per server; the pool cap keeps many remote servers from exhausting sockets
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=_HTTP_POOL_LIMIT, ttl_dns_cache=300)
+            )
+        return self._http_session
+    
+    def set_tool_routes(self, tools: list):
+        """Record which server owns each discovered tool; the first server listing a name wins."""
+        self.tool_routes = {tool.get("name"): tool.get("server_name", "") for tool in reversed(tools)}
+    
+    def server_for_tool(self, tool_name: str) -> str:
+        """Get the name of the server owning a tool, or "" if no server provides it."""
+        return self.tool_routes.get(tool_name, "")
+    
+    def tool_slot(self, server_name: str) -> asyncio.Semaphore:
+        """Get the semaphore limiting concurrent tool calls to a server."""
+        slot = self._tool_slots.get(server_name)
+        if slot is None:
+            slot = self._tool_slots[server_name] = asyncio.Semaphore(self._tool_concurrency(server_name, {}))
+        return slot
+    
+    def _tool_concurrency(self, server_name: str, server_config: Dict[str, Any]) -> int:
+        """Resolve a server's max_concurrent_tools, falling back to the default on a bad value."""
+        settings = self.config_manager.get_settings()
+        limit = server_config.get("max_concurrent_tools", settings.get("max_concurrent_tools", _DEFAULT_MAX_CONCURRENT_TOOLS))
+        try:
+            return max(1, int(limit))
+        except (TypeError, ValueError):
+            # A typo in one entry must not abort startup for every server
+            logger.warning("⚠️ Invalid max_concurrent_tools %r for server '%s'; using %d",
+                           limit, server_name, _DEFAULT_MAX_CONCURRENT_TOOLS)
+            return _DEFAULT_MAX_CONCURRENT_TOOLS
     
     def get_servers(self) -> Dict[str, Any]:
         """Get all initialized servers."""
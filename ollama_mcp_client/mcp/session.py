@@ -0,0 +1,347 @@
+"""Persistent JSON-RPC session with a subprocess MCP server."""
+
+import asyncio
+import collections
+import functools
+import itertools
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from ..utils.helpers import json_dumps, json_loads
+
+
+# Subprocess stdin write-buffer tuning for JSON-RPC frames
+_WRITE_BUFFER_HIGH = 1 << 20
+_WRITE_BUFFER_LOW = 1 << 18
+_DRAIN_THRESHOLD = 64 * 1024
+
+# MCP stdio frames are single lines; the StreamReader default of 64 KiB rejects large tool results
+_STREAM_LIMIT = 16 * 1024 * 1024
+
+# Recent stderr lines kept for error messages
+_STDERR_TAIL_LINES = 20
+
+# Keep Windows from opening a console window for every server
+_CREATION_FLAGS = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
+# MCP revision requested in the handshake; cached catalogs are keyed by it too
+PROTOCOL_VERSION = "2024-11-05"
+
+# The handshake is identical for every server, so its frames are encoded once.
+# Request ids from the per-session counter start at 1, leaving 0 for initialize.
+_INITIALIZE_ID = 0
+_HANDSHAKE_FRAMES = json_dumps({
+    "jsonrpc": "2.0",
+    "id": _INITIALIZE_ID,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": PROTOCOL_VERSION,
+        "capabilities": {},
+        "clientInfo": {
+            "name": "ollama-mcp-client",
+            "version": "1.0.0"
+        }
+    }
+}) + b"\n" + json_dumps({
+    "jsonrpc": "2.0",
+    "method": "notifications/initialized",
+    "params": {}
+}) + b"\n"
+
+# Error messages servers send for a request that arrived before initialize completed
+_NOT_INITIALIZED_MARKERS = ("not initialized", "before initialization")
+
+# Constant envelope pieces; only the id and params are encoded per request
+_FRAME_HEAD = b'{"jsonrpc":"2.0","id":'
+_EMPTY_PARAMS = b"{}"
+
+
+@functools.lru_cache(maxsize=None)
+def _method_bytes(method: str) -> bytes:
+    """Encode the method member, and the params key after it, once per method name."""
+    return b',"method":' + json_dumps(method) + b',"params":'
+
+
+def _is_init_race(response: dict) -> bool:
+    """Whether an error response says the server had not finished initializing."""
+    error = response.get("error")
+    if not isinstance(error, dict):
+        return False
+    message = str(error.get("message", "")).lower()
+    return any(marker in message for marker in _NOT_INITIALIZED_MARKERS)
+
+
+class _Request(NamedTuple):
+    """A JSON-RPC request with its encoded frame (without the trailing newline)."""
+    id: int
+    method: str
+    params: Optional[dict]
+    frame: bytes
+
+
+class MCPSession:
+    """Keeps one stdio channel open to a subprocess MCP server for its whole lifetime."""
+    
+    def __init__(self, command: List[str], cwd: Optional[str] = None, env: Optional[dict] = None,
+                 timeout: float = 30):
+        self.command = command
+        self.cwd = cwd
+        self.env = env
+        self.timeout = timeout
+        self.process = None
+        self.lock = asyncio.Lock()
+        self.initialized = False
+        self.batch_supported = True
+        self.stderr_tail = collections.deque(maxlen=_STDERR_TAIL_LINES)
+        self._request_ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._batch_waiter: Optional[asyncio.Future] = None
+        self._reader_task = None
+        self._reader_done = False
+        self._stderr_task = None
+    
+    async def start(self):
+        """Spawn the server process; the handshake runs lazily on the first request."""
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.cwd,
+            env=self.env,
+            limit=_STREAM_LIMIT,
+            creationflags=_CREATION_FLAGS
+        )
+        # Let small JSON-RPC frames sit in the transport buffer instead of draining each one
+        self.process.stdin.transport.set_write_buffer_limits(high=_WRITE_BUFFER_HIGH, low=_WRITE_BUFFER_LOW)
+        self.initialized = False
+        self._reader_done = False
+        
+        # Each process gets its own pending table, so a dead server's reader only fails its own requests
+        self._pending = {}
+        
+        # One reader routes responses to waiting requests; stderr is drained so the server never blocks on it
+        self._reader_task = asyncio.create_task(self._read_loop(self.process, self._pending))
+        self._stderr_task = asyncio.create_task(self._drain_stderr(self.process))
+    
+    @property
+    def alive(self) -> bool:
+        """Whether the server process is running and its responses are still being read."""
+        return self.process is not None and self.process.returncode is None and not self._reader_done
+    
+    def next_id(self) -> int:
+        """Get the next request id for this session."""
+        return next(self._request_ids)
+    
+    async def request(self, method: str, params: Optional[dict] = None) -> dict:
+        """Send a JSON-RPC request and return its response, respawning a crashed server."""
+        request = self._build_request(method, params)
+        if not self.initialized or not self.alive:
+            async with self.lock:
+                if not self.alive:
+                    await self.start()
+                if not self.initialized:
+                    return await self._connect(request)
+        
+        # Requests share the pipe; responses are matched by id, so none waits behind another
+        future = self._send(request)
+        await self._drain()
+        return await self._wait(request.id, future)
+    
+    async def call_batch(self, calls: List[Tuple[str, Optional[dict]]]) -> Optional[List[dict]]:
+        """Send calls as one JSON-RPC batch frame; returns None if the server rejects batches."""
+        requests = [self._build_request(method, params) for method, params in calls]
+        async with self.lock:
+            if not self.alive:
+                await self.start()
+            if not self.initialized:
+                init_future = self._expect(_INITIALIZE_ID)
+                self.process.stdin.write(_HANDSHAKE_FRAMES)
+                await self._await_initialized(init_future)
+            
+            # Batches are serialized so a frame-level error can be attributed to this batch
+            futures = [self._expect(request.id) for request in requests]
+            self._batch_waiter = asyncio.get_running_loop().create_future()
+            self.process.stdin.write(b"[" + b",".join(request.frame for request in requests) + b"]\n")
+            await self._drain()
+            
+            responses = asyncio.gather(*futures)
+            # Mark the aggregate's outcome retrieved when the batch is abandoned
+            responses.add_done_callback(lambda f: f.cancelled() or f.exception())
+            try:
+                done, _ = await asyncio.wait(
+                    [responses, self._batch_waiter],
+                    timeout=self.timeout,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    await self._kill()
+                    raise TimeoutError(f"No response from subprocess within {self.timeout}s")
+                if self._batch_waiter in done:
+                    self.batch_supported = False
+                    return None
+                return [future.result() for future in futures]
+            finally:
+                self._batch_waiter = None
+                for request, future in zip(requests, futures):
+                    self._pending.pop(request.id, None)
+                    if not future.done():
+                        future.cancel()
+    
+    async def _connect(self, request: _Request) -> dict:
+        """Pipeline initialize, initialized and the first request in one write."""
+        # Servers handle stdio messages in order, so no delay is needed between them
+        init_future = self._expect(_INITIALIZE_ID)
+        future = self._send(request, _HANDSHAKE_FRAMES)
+        try:
+            await self._drain()
+            await self._await_initialized(init_future)
+        except BaseException:
+            # Nobody will await the pipelined request now
+            self._pending.pop(request.id, None)
+            future.cancel()
+            raise
+        
+        response = await self._wait(request.id, future)
+        if _is_init_race(response):
+            # Slow-init servers may reject a request that raced the handshake; retry once.
+            # Any other error is the request's own, and the tool must not run twice.
+            request = self._build_request(request.method, request.params)
+            future = self._send(request)
+            await self._drain()
+            response = await self._wait(request.id, future)
+        return response
+    
+    async def _await_initialized(self, init_future: asyncio.Future):
+        """Wait for the initialize response and mark the session ready."""
+        init_response = await self._wait(_INITIALIZE_ID, init_future)
+        if "result" not in init_response:
+            raise RuntimeError(f"MCP server initialization failed: {init_response.get('error')}")
+        self.initialized = True
+    
+    def _build_request(self, method: str, params: Optional[dict]) -> _Request:
+        """Build a JSON-RPC request with the next id, splicing it into the constant envelope."""
+        request_id = self.next_id()
+        frame = b"".join((
+            _FRAME_HEAD,
+            str(request_id).encode(),
+            _method_bytes(method),
+            json_dumps(params) if params else _EMPTY_PARAMS,
+            b"}"
+        ))
+        return _Request(request_id, method, params, frame)
+    
+    def _expect(self, request_id: int) -> asyncio.Future:
+        """Register a future that the reader resolves with the response for request_id."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        return future
+    
+    def _send(self, request: _Request, prefix: bytes = b"") -> asyncio.Future:
+        """Write a request, after any pre-encoded frames, to stdin in one call; returns its future."""
+        future = self._expect(request.id)
+        self.process.stdin.write(prefix + request.frame + b"\n")
+        return future
+    
+    async def _drain(self):
+        """Wait for stdin to flush only once the write buffer grows large."""
+        if self.process.stdin.transport.get_write_buffer_size() > _DRAIN_THRESHOLD:
+            await self.process.stdin.drain()
+    
+    async def _wait(self, request_id: int, future: asyncio.Future) -> dict:
+        """Wait for the response to request_id, killing the server if it stalls."""
+        try:
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            await self._kill()
+            raise TimeoutError(f"No response from subprocess within {self.timeout}s")
+        finally:
+            self._pending.pop(request_id, None)
+    
+    async def _read_loop(self, process, pending: Dict[int, asyncio.Future]):
+        """Route each response line to the future waiting on its id."""
+        error = ConnectionError("No response from subprocess")
+        try:
+            while True:
+                response_line = await process.stdout.readline()
+                if not response_line:
+                    break
+                try:
+                    response = json_loads(response_line)
+                except ValueError:
+                    continue
+                
+                if isinstance(response, list):
+                    for item in response:
+                        if isinstance(item, dict):
+                            self._resolve(pending, item)
+                elif isinstance(response, dict):
+                    # A lone error with a null id is the server rejecting a batch frame
+                    if response.get("id") is None and "error" in response:
+                        if self._batch_waiter and not self._batch_waiter.done():
+                            self._batch_waiter.set_result(response)
+                        continue
+                    # Server notifications have no id and are skipped
+                    self._resolve(pending, response)
+        except Exception as e:
+            error = ConnectionError(f"Lost connection to subprocess: {e}")
+        
+        if self.stderr_tail:
+            error = ConnectionError(f"{error} (stderr: {self.stderr_tail[-1]})")
+        # The server is gone; every outstanding request fails now rather than at its timeout
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+        pending.clear()
+        if self.process is process:
+            # Set before any await, so the next request respawns instead of writing to this process
+            self.initialized = False
+            self._reader_done = True
+        
+        # Without its reader the process is unusable: stop one that is still running and reap it
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+    
+    @staticmethod
+    def _resolve(pending: Dict[int, asyncio.Future], response: dict):
+        """Complete the future for a response, if anyone is still waiting on it."""
+        future = pending.pop(response.get("id"), None)
+        if future and not future.done():
+            future.set_result(response)
+    
+    async def _drain_stderr(self, process):
+        """Keep reading stderr so a chatty server never fills the pipe, keeping the last lines."""
+        try:
+            while True:
+                line = await process.stderr.readline()
+                if not line:
+                    break
+                self.stderr_tail.append(line.decode(errors="replace").rstrip())
+        except Exception:
+            pass
+    
+    async def _kill(self):
+        """Kill the server process after a stall."""
+        if self.alive:
+            self.process.kill()
+            await self.process.wait()
+    
+    async def close(self):
+        """Close stdin so the server exits, killing it if it does not."""
+        if self.alive:
+            try:
+                self.process.stdin.close()
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        for task in (self._reader_task, self._stderr_task):
+            if task:
+                try:
+                    await asyncio.wait_for(task, timeout=1)
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    pass
\ No newline at end of file
@@ -1,10 +1,59 @@
 """Tool discovery from different MCP server types."""
 
-import json
-import aiohttp
+import asyncio
+import functools
 import inspect
-from typing import List, Dict, Any
+import logging
+from typing import List, Dict, Any, Optional
 from .server_manager import ServerManager
+from ..utils.helpers import json_loads
+
+logger = logging.getLogger(__name__)
+
+# JSON schema types for annotated parameters; anything else is a string
+_ANNOT_MAP = {int: "integer", float: "number", bool: "boolean", str: "string"}
+
+
+@functools.lru_cache(maxsize=None)
+def _extract_params_cached(tool_obj) -> dict:
+    """Build parameter info from a function signature, once per function."""
+    parameters = {}
+    for param_name, param in inspect.signature(tool_obj).parameters.items():
+        parameters[param_name] = {
+            # Only plain classes are looked up; string or unhashable annotations fall through
+            "type": _ANNOT_MAP.get(param.annotation, "string") if isinstance(param.annotation, type) else "string",
+            "required": param.default is inspect.Parameter.empty
+        }
+    return parameters
+
+
+def function_parameters(func) -> dict:
+    """Get parameter info for a function; copied so callers never mutate the memoized result."""
+    return {name: dict(info) for name, info in _extract_params_cached(func).items()}
+
+
+def tool(func):
+    """Mark a function in a local server module as an MCP tool."""
+    func._is_mcp_tool = True
+    return func
+
+
+def _local_tool_functions(module) -> List[tuple]:
+    """List (name, function) pairs a local module exposes as tools."""
+    # An explicit __mcp_tools__ manifest wins, then @tool-marked functions
+    manifest = getattr(module, "__mcp_tools__", None)
+    if manifest is not None:
+        return [(getattr(obj, "__name__", repr(obj)), obj) for obj in manifest if callable(obj)]
+    members = vars(module)
+    marked = [(name, obj) for name, obj in members.items() if getattr(obj, "_is_mcp_tool", False)]
+    if marked:
+        return marked
+    # Unmarked modules fall back to public functions defined in the module itself, so imports are never tools
+    module_name = getattr(module, "__name__", None)
+    return [
+        (name, obj) for name, obj in members.items()
+        if not name.startswith('_') and inspect.isfunction(obj) and obj.__module__ == module_name
+    ]
 
 
 class ToolDiscovery:
@@ -12,19 +61,35 @@ class ToolDiscovery:
     
     def __init__(self, server_manager: ServerManager):
         self.server_manager = server_manager
+        self.catalog = {}
     
-    async def discover_all_tools(self) -> List[dict]:
-        """Discover tools from all configured servers."""
+    async def discover_all_tools(self, cached: Optional[Dict[str, list]] = None) -> List[dict]:
+        """Discover tools from all configured servers, reusing cached catalogs where given."""
         all_tools = []
         servers = self.server_manager.get_servers()
+        cached = cached or {}
+        self.catalog = {}
+        
+        # Servers have independent I/O, so discover them concurrently
+        pending = [name for name in servers if name not in cached]
+        results = await asyncio.gather(
+            *(self._discover_server_tools(server_name, servers[server_name]) for server_name in pending),
+            return_exceptions=True
+        )
+        discovered = dict(zip(pending, results))
         
-        for server_name, server_info in servers.items():
-            try:
-                tools = await self._discover_server_tools(server_name, server_info)
-                all_tools.extend(tools)
-                print(f"📋 Discovered {len(tools)} tools from server '{server_name}'")
-            except Exception as e:
-                print(f"❌ Error discovering tools from server '{server_name}': {e}")
+        for server_name in servers:
+            if server_name in cached:
+                result = cached[server_name]
+                logger.info("📋 Loaded %d cached tools from server '%s'", len(result), server_name)
+            else:
+                result = discovered[server_name]
+                if isinstance(result, Exception):
+                    logger.error("❌ Error discovering tools from server '%s': %s", server_name, result)
+                    continue
+                logger.info("📋 Discovered %d tools from server '%s'", len(result), server_name)
+            all_tools.extend(result)
+            self.catalog[server_name] = result
         
         return all_tools
     
@@ -35,11 +100,11 @@ class ToolDiscovery:
         if server_type == "local":
             return await self._discover_local_tools(server_info)
         elif server_type == "remote":
-            return await self._discover_remote_tools(server_info)
+            return await self._discover_remote_tools(server_info, server_name)
         elif server_type == "subprocess":
             return await self._discover_subprocess_tools(server_info)
         else:
-            print(f"⚠️ Unknown server type: {server_type}")
+            logger.warning("⚠️ Unknown server type: %s", server_type)
             return []
     
     async def _discover_local_tools(self, server_info: dict) -> list:
@@ -49,24 +114,23 @@ class ToolDiscovery:
         if not module:
             return tools
         
-        # Look for functions decorated with @tool or similar
-        for name in dir(module):
-            obj = getattr(module, name)
-            if callable(obj) and not name.startswith('_'):
-                # Extract tool information
-                tool_info = {
-                    "name": f"local_server_{name}",
-                    "server_name": "local_server", 
-                    "function": obj,
-                    "description": getattr(obj, '__doc__', f"Execute {name}"),
-                    "parameters": self._extract_tool_parameters(obj)
-                }
-                tools.append(tool_info)
+        # Only the module's declared tool surface is inspected, not every attribute
+        for name, obj in _local_tool_functions(module):
+            # Extract tool information
+            tool_info = {
+                "name": f"local_server_{name}",
+                "server_name": "local_server", 
+                "function": obj,
+                "is_coroutine": inspect.iscoroutinefunction(obj),
+                "description": getattr(obj, '__doc__', f"Execute {name}"),
+                "parameters": self._extract_tool_parameters(obj)
+            }
+            tools.append(tool_info)
         
         return tools
     
-    async def _discover_remote_tools(self, server_info: dict) -> list:
-        """Discover tools from a remote MCP server."""
+    async def _discover_remote_tools(self, server_info: dict, server_name: str = "") -> list:
+        """Discover tools from a remote MCP server, revalidating a cached catalog when possible."""
         tools = []
         config = server_info.get("config", {})
         base_url = config.get("url", "")
@@ -75,125 +139,64 @@ class ToolDiscovery:
             return tools
         
         try:
-            async with aiohttp.ClientSession() as session:
-                # Assuming the remote server has a /tools endpoint
-                async with session.get(f"{base_url}/tools") as response:
-                    if response.status == 200:
-                        tools_data = await response.json()
-                        for tool_data in tools_data.get("tools", []):
-                            tool_info = {
-                                "name": f"remote_server_{tool_data.get('name', 'unknown')}",
-                                "server_name": "remote_server",
-                                "description": tool_data.get("description", "Remote tool"),
-                                "parameters": tool_data.get("parameters", {}),
-                                "url": base_url
-                            }
-                            tools.append(tool_info)
+            session = self.server_manager.http_session()
+            catalog_cache = self.server_manager.catalog_cache
+            # Assuming the remote server has a /tools endpoint; a 304 means the cached catalog still holds
+            headers = catalog_cache.conditional_headers(server_name)
+            async with session.get(f"{base_url}/tools", headers=headers) as response:
+                if response.status == 304:
+                    cached_tools = catalog_cache.revalidated_tools(server_name)
+                    if cached_tools is not None:
+                        return list(cached_tools)
+                if response.status == 200:
+                    catalog_cache.set_validators(
+                        server_name,
+                        response.headers.get("ETag"),
+                        response.headers.get("Last-Modified")
+                    )
+                    tools_data = json_loads(await response.read())
+                    for tool_data in tools_data.get("tools", []):
+                        tool_info = {
+                            "name": f"remote_server_{tool_data.get('name', 'unknown')}",
+                            "server_name": "remote_server",
+                            "description": tool_data.get("description", "Remote tool"),
+                            "parameters": tool_data.get("parameters", {}),
+                            "url": base_url
+                        }
+                        tools.append(tool_info)
         except Exception as e:
-            print(f"❌ Error discovering remote tools: {e}")
+            logger.error("❌ Error discovering remote tools: %s", e)
         
         return tools
     
     async def _discover_subprocess_tools(self, server_info: dict) -> list:
         """Discover tools from a subprocess MCP server."""
         tools = []
-        process = server_info.get("process")
-        if not process:
+        session = server_info.get("session")
+        if not session:
             return tools
         
         try:
-            # Step 1: Send initialize request
-            initialize_request = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {},
-                    "clientInfo": {
-                        "name": "ollama-mcp-client",
-                        "version": "1.0.0"
-                    }
-                }
-            }
+            # The session is persistent; only tools/list goes over the wire
+            tools_response = await session.request("tools/list")
             
-            process.stdin.write(json.dumps(initialize_request) + "\n")
-            process.stdin.flush()
-            
-            # Read initialize response
-            response_line = process.stdout.readline()
-            if response_line:
-                response = json.loads(response_line.strip())
-                if "result" in response:
-                    # Step 2: Send initialized notification
-                    initialized_notification = {
-                        "jsonrpc": "2.0",
-                        "method": "notifications/initialized",
-                        "params": {}
-                    }
-                    
-                    process.stdin.write(json.dumps(initialized_notification) + "\n")
-                    process.stdin.flush()
-                    
-                    # Small delay for server to process
-                    import asyncio
-                    await asyncio.sleep(0.1)
-                    
-                    # Step 3: Send tools/list request
-                    tools_request = {
-                        "jsonrpc": "2.0",
-                        "id": 2,
-                        "method": "tools/list",
-                        "params": {}
+            if "result" in tools_response and "tools" in tools_response["result"]:
+                for tool_data in tools_response["result"]["tools"]:
+                    tool_info = {
+                        "name": f"local_server_{tool_data.get('name', 'unknown')}",
+                        "server_name": "local_server",
+                        "description": tool_data.get("description", "Tool description"),
+                        "parameters": tool_data.get("inputSchema", {}).get("properties", {})
                     }
-                    
-                    process.stdin.write(json.dumps(tools_request) + "\n")
-                    process.stdin.flush()
-                    
-                    # Read tools response
-                    tools_response_line = process.stdout.readline()
-                    if tools_response_line:
-                        tools_response = json.loads(tools_response_line.strip())
-                        
-                        if "result" in tools_response and "tools" in tools_response["result"]:
-                            for tool_data in tools_response["result"]["tools"]:
-                                tool_info = {
-                                    "name": f"local_server_{tool_data.get('name', 'unknown')}",
-                                    "server_name": "local_server",
-                                    "description": tool_data.get("description", "Tool description"),
-                                    "parameters": tool_data.get("inputSchema", {}).get("properties", {}),
-                                    "process": process
-                                }
-                                tools.append(tool_info)
+                    tools.append(tool_info)
         except Exception as e:
-            print(f"❌ Error discovering subprocess tools: {e}")
+            logger.error("❌ Error discovering subprocess tools: %s", e)
         
         return tools
     
     def _extract_tool_parameters(self, tool_obj) -> dict:
         """Extract parameter information from a function."""
         try:
-            sig = inspect.signature(tool_obj)
-            parameters = {}
-            
-            for param_name, param in sig.parameters.items():
-                param_info = {
-                    "type": "string",  # Default type
-                    "required": param.default == inspect.Parameter.empty
-                }
-                
-                # Try to infer type from annotation
-                if param.annotation != inspect.Parameter.empty:
-                    if param.annotation == int:
-                        param_info["type"] = "integer"
-                    elif param.annotation == float:
-                        param_info["type"] = "number" 
-                    elif param.annotation == bool:
-                        param_info["type"] = "boolean"
-                    # Add more type mappings as needed
-                
-                parameters[param_name] = param_info
-            
-            return parameters
+            return function_parameters(tool_obj)
         except Exception:
             return {}
\ No newline at end of file
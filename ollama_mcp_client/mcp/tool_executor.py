@@ -1,9 +1,12 @@
 """Tool execution for different MCP server types."""
 
-import json
-import aiohttp
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from .server_manager import ServerManager
+from ..utils.helpers import json_dumps, json_loads
+
+
+# Remote payloads are pre-serialized to bytes, so the content type is set explicitly
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
 
 class ToolExecutor:
@@ -11,6 +14,8 @@ class ToolExecutor:
     
     def __init__(self, server_manager: ServerManager):
         self.server_manager = server_manager
+        # Latest _meta.cache_hint seen per tool name
+        self.cache_hints: Dict[str, str] = {}
     
     async def call_tool(self, tool_info: dict, arguments: dict) -> str:
         """Execute a tool with the given arguments."""
@@ -23,17 +28,22 @@ class ToolExecutor:
         server_type = server_info.get("type")
         
         try:
-            if server_type == "local":
-                return await self._call_local_tool(tool_info, arguments)
-            elif server_type == "remote":
-                return await self._call_remote_tool(tool_info, arguments, server_info)
-            elif server_type == "subprocess":
-                return await self._call_subprocess_tool(tool_info, arguments, server_info)
-            else:
-                return f"❌ Unknown server type: {server_type}"
+            async with self.server_manager.tool_slot(server_name):
+                return await self._dispatch(server_type, tool_info, arguments, server_info)
         except Exception as e:
             return f"❌ Error calling tool '{tool_info.get('name', 'unknown')}': {e}"
     
+    async def _dispatch(self, server_type: str, tool_info: dict, arguments: dict, server_info: dict) -> str:
+        """Route a call to the handler for its server type."""
+        if server_type == "local":
+            return await self._call_local_tool(tool_info, arguments)
+        elif server_type == "remote":
+            return await self._call_remote_tool(tool_info, arguments, server_info)
+        elif server_type == "subprocess":
+            return await self._call_subprocess_tool(tool_info, arguments, server_info)
+        else:
+            return f"❌ Unknown server type: {server_type}"
+    
     async def _call_local_tool(self, tool_info: dict, arguments: dict) -> str:
         """Call a tool from a local Python module."""
         function = tool_info.get("function")
@@ -41,7 +51,11 @@ class ToolExecutor:
             return "❌ No function found for local tool"
         
         try:
-            result = function(**arguments)
+            # Whether to await is decided once at discovery
+            if tool_info.get("is_coroutine"):
+                result = await function(**arguments)
+            else:
+                result = function(**arguments)
             return str(result)
         except Exception as e:
             return f"❌ Error executing local tool: {e}"
@@ -56,60 +70,83 @@ class ToolExecutor:
             return "❌ No URL configured for remote server"
         
         try:
-            async with aiohttp.ClientSession() as session:
-                payload = {
-                    "tool": tool_name,
-                    "arguments": arguments
-                }
-                async with session.post(f"{base_url}/execute", json=payload) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result.get("result", "No result")
-                    else:
-                        return f"❌ Remote tool call failed with status {response.status}"
+            session = self.server_manager.http_session()
+            payload = {
+                "tool": tool_name,
+                "arguments": arguments
+            }
+            async with session.post(f"{base_url}/execute", data=json_dumps(payload), headers=_JSON_HEADERS) as response:
+                if response.status == 200:
+                    result = json_loads(await response.read())
+                    return result.get("result", "No result")
+                else:
+                    return f"❌ Remote tool call failed with status {response.status}"
         except Exception as e:
             return f"❌ Error calling remote tool: {e}"
     
     async def _call_subprocess_tool(self, tool_info: dict, arguments: dict, server_info: dict) -> str:
         """Call a tool from a subprocess MCP server."""
-        process = server_info.get("process")
-        if not process:
-            return "❌ No process found for subprocess server"
+        session = server_info.get("session")
+        if not session:
+            return "❌ No session found for subprocess server"
         
-        # Extract actual tool name (remove server prefix)
-        tool_name = tool_info.get("name", "").replace("local_server_", "")
+        try:
+            # Send tool call request via JSON-RPC on the persistent session
+            response = await session.request("tools/call", self._tools_call_params(tool_info, arguments))
+            self._record_cache_hint(tool_info, response)
+            return self._format_subprocess_response(response)
+        except Exception as e:
+            return f"❌ Error calling subprocess tool: {e}"
+    
+    async def call_subprocess_batch(self, server_info: dict, calls: List[Tuple[dict, dict]]) -> List[str]:
+        """Call several tools on one subprocess server in a single JSON-RPC batch frame."""
+        session = server_info.get("session")
+        if not session:
+            return ["❌ No session found for subprocess server"] * len(calls)
         
         try:
-            # Send tool call request via JSON-RPC
-            request = {
-                "jsonrpc": "2.0",
-                "id": 2,
-                "method": "tools/call",
-                "params": {
-                    "name": tool_name,
-                    "arguments": arguments
-                }
-            }
-            
-            process.stdin.write(json.dumps(request) + "\n")
-            process.stdin.flush()
-            
-            # Read response
-            response_line = process.stdout.readline()
-            if response_line:
-                response = json.loads(response_line.strip())
-                
-                if "result" in response:
-                    content = response["result"].get("content", [])
-                    if content and len(content) > 0:
-                        return content[0].get("text", "No result")
-                    else:
-                        return "No content in result"
-                elif "error" in response:
-                    return f"❌ Tool error: {response['error'].get('message', 'Unknown error')}"
-                else:
-                    return "❌ Invalid response format"
-            else:
-                return "❌ No response from subprocess"
+            responses = None
+            if session.batch_supported:
+                # One frame occupies one of the server's tool-call slots
+                async with self.server_manager.tool_slot(calls[0][0].get("server_name", "")):
+                    responses = await session.call_batch(
+                        [("tools/call", self._tools_call_params(tool_info, arguments)) for tool_info, arguments in calls]
+                    )
+            if responses is None:
+                # Server rejected the batch; fall back to one request per call
+                return [await self._call_subprocess_tool(tool_info, arguments, server_info)
+                        for tool_info, arguments in calls]
+            for (tool_info, _), response in zip(calls, responses):
+                self._record_cache_hint(tool_info, response)
+            return [self._format_subprocess_response(response) for response in responses]
         except Exception as e:
-            return f"❌ Error calling subprocess tool: {e}"
\ No newline at end of file
+            return [f"❌ Error calling subprocess tool: {e}"] * len(calls)
+    
+    def _tools_call_params(self, tool_info: dict, arguments: dict) -> dict:
+        """Build tools/call params, removing the server prefix from the tool name."""
+        return {
+            "name": tool_info.get("name", "").replace("local_server_", ""),
+            "arguments": arguments
+        }
+    
+    def _record_cache_hint(self, tool_info: dict, response: dict):
+        """Remember whether the server marked this tool's results as cacheable."""
+        result = response.get("result")
+        if not isinstance(result, dict) or result.get("isError"):
+            return  # Errors, JSON-RPC or tool-raised, say nothing about cacheability
+        meta = result.get("_meta")
+        self.cache_hints[tool_info.get("name", "")] = meta.get("cache_hint") if isinstance(meta, dict) else None
+    
+    def _format_subprocess_response(self, response: dict) -> str:
+        """Extract the text result from a tools/call response."""
+        if "result" in response:
+            content = response["result"].get("content", [])
+            text = content[0].get("text", "No result") if content else "No content in result"
+            # Tool-raised failures arrive as results flagged isError; they get the ❌ prefix every error carries
+            if response["result"].get("isError"):
+                return f"❌ Tool error: {text}"
+            return text
+        elif "error" in response:
+            return f"❌ Tool error: {response['error'].get('message', 'Unknown error')}"
+        else:
+            return "❌ Invalid response format"
\ No newline at end of file
@@ -1,12 +1,31 @@
 """MCP Tools facade - orchestrates all MCP components."""
 
-from typing import Dict, List
+import asyncio
+import collections
+import json
+from typing import Dict, List, Optional, Tuple
 from .config import ConfigManager
 from .server_manager import ServerManager
 from .tool_discovery import ToolDiscovery
 from .tool_executor import ToolExecutor
 
 
+# Results kept for tools whose servers mark them cacheable
+_RESULT_CACHE_SIZE = 128
+
+
+def format_tool_entry(tool: dict, name: str, description: str) -> str:
+    """Render one tool's lines of the prompt description."""
+    parameters = tool.get("parameters") or {}
+    if not parameters:
+        return f"  - {name}: {description}\n"
+    param_line = ", ".join(
+        f"{param_name} ({param_info.get('type', 'string')})" + (" (required)" if param_info.get('required', False) else "")
+        for param_name, param_info in parameters.items()
+    )
+    return f"  - {name}: {description}\n    Parameters: {param_line}\n"
+
+
 class MCPTools:
     """Facade for MCP server communication - orchestrates all components."""
     
@@ -16,65 +35,185 @@ class MCPTools:
         self.tool_discovery = ToolDiscovery(self.server_manager)
         self.tool_executor = ToolExecutor(self.server_manager)
         self.available_tools = []
+        self._tool_by_name: Dict[str, dict] = {}
+        self._tools_by_server: Dict[str, List[dict]] = {}
+        self._tools_desc_cache: Optional[str] = None
+        self._tools_desc_version = 0
+        self._result_cache: "collections.OrderedDict[Tuple[str, str], str]" = collections.OrderedDict()
     
-    async def initialize_servers(self):
-        """Initialize all servers and discover tools."""
-        await self.server_manager.initialize_servers()
-        self.available_tools = await self.tool_discovery.discover_all_tools()
+    async def initialize_servers(self, refresh: bool = False):
+        """Initialize all servers and discover tools, using the catalog cache unless refresh is set."""
+        if refresh:
+            self.server_manager.invalidate_cache()
+        await self.server_manager.initialize_servers(use_cache=not refresh)
+        
+        # Servers whose catalog was cached were not spawned and skip tools/list
+        cached = {name: server_info["cached_tools"] for name, server_info in self.servers.items()
+                  if "cached_tools" in server_info}
+        self.available_tools = await self.tool_discovery.discover_all_tools(cached)
+        
+        # Local tools hold live function objects and empty results may be transient, so neither is persisted
+        catalog = {name: tools for name, tools in self.tool_discovery.catalog.items()
+                   if tools and self.servers[name].get("type") != "local"}
+        if catalog != cached:
+            self.server_manager.catalog_cache.save(catalog)
+        
+        self._index_tools()
     
-    async def call_tool(self, tool_name: str, arguments: Dict) -> str:
-        """Call a tool by name with the given arguments."""
-        # Find the tool by name
-        tool_info = None
+    def _index_tools(self):
+        """Rebuild the name lookup and per-server grouping after available_tools changes."""
+        # Reversed so the first tool with a given name wins, as the old linear scan did
+        self._tool_by_name = {tool.get("name"): tool for tool in reversed(self.available_tools)}
+        self.server_manager.set_tool_routes(self.available_tools)
+        # Description and /servers read the grouping instead of rescanning every tool
+        self._tools_by_server = {}
         for tool in self.available_tools:
-            if tool.get("name") == tool_name:
-                tool_info = tool
-                break
+            self._tools_by_server.setdefault(tool.get("server_name", "unknown"), []).append(tool)
         
+        # Tool state changed, so the prompt description and memoized results are stale
+        self._tools_desc_cache = None
+        self._tools_desc_version += 1
+        self._result_cache.clear()
+    
+    async def shutdown(self):
+        """Shut down all persistent server processes."""
+        await self.server_manager.shutdown()
+    
+    async def __aenter__(self):
+        await self.initialize_servers()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.shutdown()
+    
+    async def call_tool(self, tool_name: str, arguments: Dict) -> str:
+        """Call a tool by name with the given arguments."""
+        tool_info = self._tool_by_name.get(tool_name)
         if not tool_info:
             return f"❌ Tool '{tool_name}' not found"
         
-        return await self.tool_executor.call_tool(tool_info, arguments)
+        cached = self._cached_result(tool_name, arguments)
+        if cached is not None:
+            return cached
+        
+        result = await self.tool_executor.call_tool(tool_info, arguments)
+        self._store_result(tool_name, arguments, result)
+        return result
+    
+    def _cached_result(self, tool_name: str, arguments: Dict) -> Optional[str]:
+        """Return a memoized result if the tool's last response carried _meta.cache_hint == "cache"."""
+        if self.tool_executor.cache_hints.get(tool_name) != "cache":
+            return None
+        key = (tool_name, json.dumps(arguments, sort_keys=True, default=str))
+        result = self._result_cache.get(key)
+        if result is not None:
+            self._result_cache.move_to_end(key)
+        return result
+    
+    def _store_result(self, tool_name: str, arguments: Dict, result: str):
+        """Memoize a successful result for cacheable tools, evicting the least recently used."""
+        if self.tool_executor.cache_hints.get(tool_name) != "cache" or result.startswith("❌"):
+            return
+        key = (tool_name, json.dumps(arguments, sort_keys=True, default=str))
+        self._result_cache[key] = result
+        self._result_cache.move_to_end(key)
+        if len(self._result_cache) > _RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+    
+    async def call_tools_batch(self, calls: List[Tuple[str, Dict]]) -> List[str]:
+        """Call several independent tools concurrently; results keep the order of calls."""
+        results = [None] * len(calls)
+        batches = {}
+        jobs = []
+        
+        # Calls to a subprocess server with "batch" enabled share one JSON-RPC frame
+        for i, (tool_name, arguments) in enumerate(calls):
+            cached = self._cached_result(tool_name, arguments)
+            if cached is not None:
+                results[i] = cached
+                continue
+            server_name = self.server_manager.server_for_tool(tool_name)
+            server_info = self.server_manager.get_server(server_name)
+            if server_info.get("type") == "subprocess" and server_info["config"].get("batch", False):
+                batches.setdefault(server_name, []).append((i, self._tool_by_name[tool_name], arguments))
+            else:
+                jobs.append(([i], self.call_tool(tool_name, arguments)))
+        
+        for server_name, batch in batches.items():
+            if len(batch) == 1:
+                i, tool_info, arguments = batch[0]
+                jobs.append(([i], self.tool_executor.call_tool(tool_info, arguments)))
+            else:
+                slots = [i for i, _, _ in batch]
+                jobs.append((slots, self.tool_executor.call_subprocess_batch(
+                    self.server_manager.get_server(server_name),
+                    [(tool_info, arguments) for _, tool_info, arguments in batch]
+                )))
+        
+        # Sessions match responses by id, so calls overlap within and across servers
+        outcomes = await asyncio.gather(*(job for _, job in jobs), return_exceptions=True)
+        for (slots, _), outcome in zip(jobs, outcomes):
+            if isinstance(outcome, Exception):
+                outcome = [f"❌ Error calling {calls[i][0]}: {outcome}" for i in slots]
+            elif len(slots) == 1 and isinstance(outcome, str):
+                outcome = [outcome]
+            for i, result in zip(slots, outcome):
+                results[i] = result
+                self._store_result(calls[i][0], calls[i][1], result)
+        return results
+    
+    async def batch_execute(self, operations: List[Dict], stop_on_error: bool = False) -> List[Dict]:
+        """Run [{"name", "arguments"}] operations and report each as {"index", "tool", "ok", "result" or "error"}."""
+        # Non-object entries become unknown-tool calls, so they fail their own row only
+        calls = [(op.get("name", ""), op.get("arguments") or {}) if isinstance(op, dict) else ("", {})
+                 for op in operations]
+        if not stop_on_error:
+            results = await self.call_tools_batch(calls)
+        else:
+            # Stopping at the first failure needs the calls in order; later ones are skipped
+            results = []
+            for tool_name, arguments in calls:
+                result = await self.call_tool(tool_name, arguments)
+                results.append(result)
+                if result.startswith("❌"):
+                    break
+        
+        report = []
+        for index, (tool_name, _) in enumerate(calls):
+            if index >= len(results):
+                report.append({"index": index, "tool": tool_name, "ok": False, "error": "Skipped after an earlier error"})
+            elif results[index].startswith("❌"):
+                report.append({"index": index, "tool": tool_name, "ok": False, "error": results[index]})
+            else:
+                report.append({"index": index, "tool": tool_name, "ok": True, "result": results[index]})
+        return report
     
     def get_tools_description(self) -> str:
         """Get a formatted description of all available tools."""
         if not self.available_tools:
             return "No MCP tools available."
         
-        # Group tools by server
-        servers_tools = {}
-        for tool in self.available_tools:
-            server_name = tool.get("server_name", "unknown")
-            if server_name not in servers_tools:
-                servers_tools[server_name] = []
-            servers_tools[server_name].append(tool)
+        # The catalog is fixed between discoveries, so build the text once
+        if self._tools_desc_cache is not None:
+            return self._tools_desc_cache
         
-        tools_desc = "You have access to these MCP tools:\n\n"
+        parts = ["You have access to these MCP tools:\n\n"]
         
-        for server_name, tools in servers_tools.items():
+        for server_name, tools in self._tools_by_server.items():
             server_info = self.server_manager.get_server(server_name)
             server_config = server_info.get("config", {})
             server_desc = server_config.get("description", f"{server_name} server")
             
-            tools_desc += f"📡 {server_desc}:\n"
+            parts.append(f"📡 {server_desc}:\n")
             
-            for tool in tools:
-                tool_name = tool.get("name", "unknown")
-                tool_desc = tool.get("description", "No description")
-                tools_desc += f"  - {tool_name}: {tool_desc}\n"
-                
-                # Add parameter information
-                params = []
-                parameters = tool.get("parameters", {})
-                for param_name, param_info in parameters.items():
-                    param_type = param_info.get("type", "string") 
-                    required = " (required)" if param_info.get('required', False) else ""
-                    params.append(f"{param_name} ({param_type}){required}")
-                if params:
-                    tools_desc += f"    Parameters: {', '.join(params)}\n"
-        
-        tools_desc += "\n\nTo use a tool, include: [TOOL:tool_name:{\"param\":\"value\"}]"
-        return tools_desc
+            parts.extend(
+                format_tool_entry(tool, tool.get("name", "unknown"), tool.get("description", "No description"))
+                for tool in tools
+            )
+        
+        parts.append("\n\nTo use a tool, include: [TOOL:tool_name:{\"param\":\"value\"}]")
+        self._tools_desc_cache = "".join(parts)
+        return self._tools_desc_cache
     
     def list_servers(self) -> dict:
         """Get information about configured servers."""
@@ -82,11 +221,19 @@ class MCPTools:
         
         # Add tool counts
         for server_name in servers_info:
-            tool_count = len([t for t in self.available_tools if t.get("server_name") == server_name])
-            servers_info[server_name]["tools_count"] = tool_count
+            servers_info[server_name]["tools_count"] = len(self._tools_by_server.get(server_name, ()))
         
         return servers_info
     
+    def server_for_tool(self, tool_name: str) -> str:
+        """Get the name of the server owning a tool, or "" if no server provides it."""
+        return self.server_manager.server_for_tool(tool_name)
+    
+    @property
+    def tools_version(self) -> int:
+        """Counter bumped whenever the tool set changes, for callers caching derived text."""
+        return self._tools_desc_version
+    
     @property
     def servers(self) -> Dict:
         """Get all initialized servers (for backward compatibility)."""
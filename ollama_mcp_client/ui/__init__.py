@@ -1,6 +1,7 @@
 """User interface modules."""
 
 from .loading import LoadingIndicator
+from .output import BufferedPrinter
 from .interface import ChatInterface
 
-__all__ = ['ChatInterface', 'LoadingIndicator']
\ No newline at end of file
+__all__ = ['ChatInterface', 'LoadingIndicator', 'BufferedPrinter']
\ No newline at end of file
@@ -1,6 +1,9 @@
 """Interactive chat interface for the Ollama MCP client."""
 
+import asyncio
 from .loading import LoadingIndicator
+from .output import BufferedPrinter
+from ..utils.helpers import ainput
 
 
 class ChatInterface:
@@ -10,6 +13,8 @@ class ChatInterface:
         self.client = client
         self.mcp_tools = mcp_tools
         self.streaming = True
+        # One indicator, restarted each turn
+        self.loading = LoadingIndicator("🤖 Assistant: ")
         
     async def start_chat(self, model_name: str):
         """Start the interactive chat session."""
@@ -25,7 +30,7 @@ class ChatInterface:
         try:
             while True:
                 # Get user input
-                user_input = input("\n👤 You: ").strip()
+                user_input = (await ainput("\n👤 You: ")).strip()
                 
                 # Handle quit/exit commands
                 if user_input.lower() in ['quit', 'exit']:
@@ -40,7 +45,8 @@ class ChatInterface:
                 
                 await self._handle_chat_message(model_name, user_input)
                         
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            # Ctrl+C cancels the main task while input is read off-loop
             print("\n\n👋 Goodbye!")
         except Exception as e:
             print(f"\n❌ Unexpected error: {e}")
@@ -94,11 +100,11 @@ class ChatInterface:
     
     async def _handle_streaming_response(self, model_name: str, user_input: str):
         """Handle streaming response from the LLM."""
-        loading = LoadingIndicator("🤖 Assistant: ")
+        loading = self.loading
         loading.start()
         
+        printer = BufferedPrinter()
         try:
-            response_parts = []
             first_content = True
             
             async for chunk in self.client.chat_stream(model_name, user_input):
@@ -110,20 +116,21 @@ class ChatInterface:
                     if first_content:
                         loading.stop()
                         first_content = False
-                    print(content, end="", flush=True)
-                    response_parts.append(content)
+                    printer.write(content)
             
             if first_content:  # No content was streamed
                 loading.stop()
             
+            printer.flush()
             print()  # New line after streaming
         except Exception as e:
+            printer.flush()
             loading.stop()
             print(f"❌ Error during streaming: {e}")
     
     async def _handle_non_streaming_response(self, model_name: str, user_input: str):
         """Handle non-streaming response from the LLM."""
-        loading = LoadingIndicator("🤖 Assistant: ")
+        loading = self.loading
         loading.start()
         
         try:
@@ -139,16 +146,16 @@ class ChatInterface:
             print(f"❌ Error getting response: {e}")
 
 
-async def setup_mcp_tools():
+async def setup_mcp_tools(refresh_tools: bool = False):
     """Setup and initialize MCP tools."""
     from ..mcp import MCPTools
     
     print("🔧 Loading MCP tools from configuration...")
-    use_tools = input("\n🤔 Enable MCP tools? (y/n, default: y): ").strip().lower()
+    use_tools = (await ainput("\n🤔 Enable MCP tools? (y/n, default: y): ")).strip().lower()
     
     if use_tools in ['', 'y', 'yes']:
         mcp_tools = MCPTools()
-        await mcp_tools.initialize_servers()
+        await mcp_tools.initialize_servers(refresh=refresh_tools)
         
         if mcp_tools.available_tools:
             print(f"✅ Loaded MCP tools! Found {len(mcp_tools.available_tools)} tools from {len(mcp_tools.servers)} servers:")
@@ -161,6 +168,7 @@ async def setup_mcp_tools():
             return mcp_tools
         else:
             print("⚠️  No MCP tools available. Continuing without tools.")
+            await mcp_tools.shutdown()
             return None
     else:
         print("🚫 MCP tools disabled for testing.")
@@ -181,7 +189,7 @@ async def select_model(client):
         return None
     
     # Get model choice
-    model_name = input(f"\n🤖 Choose model (default: {models[0] if models else 'llama2'}): ").strip()
+    model_name = (await ainput(f"\n🤖 Choose model (default: {models[0] if models else 'llama2'}): ")).strip()
     if not model_name:
         model_name = models[0] if models else 'llama2'
     
@@ -0,0 +1,36 @@
+"""Buffered terminal output for streamed responses."""
+
+import asyncio
+import sys
+
+
+class BufferedPrinter:
+    """Coalesces streamed chunks into fewer stdout writes and flushes."""
+    
+    def __init__(self, max_chars: int = 256, max_delay: float = 0.03):
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self._parts = []
+        self._size = 0
+        self._timer = None
+    
+    def write(self, text: str):
+        """Queue text, flushing once enough has built up."""
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.max_chars:
+            self.flush()
+        elif self._timer is None:
+            # Small chunks still reach the screen within max_delay even if the stream pauses
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self.flush)
+    
+    def flush(self):
+        """Write everything queued in one call."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._parts:
+            sys.stdout.write("".join(self._parts))
+            sys.stdout.flush()
+            self._parts.clear()
+            self._size = 0
\ No newline at end of file
@@ -1,5 +1,5 @@
 """Utility modules for the Ollama MCP client."""
 
-from .helpers import LoadingIndicator
+from .helpers import LoadingIndicator, ainput, configure_logging, json_dumps, json_loads
 
-__all__ = ['LoadingIndicator']
\ No newline at end of file
+__all__ = ['LoadingIndicator', 'ainput', 'configure_logging', 'json_dumps', 'json_loads']
\ No newline at end of file
@@ -1,7 +1,77 @@
 """Utility functions and classes."""
 
+import asyncio
+import json
+import logging
+import os
+import sys
 import threading
-import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    def json_dumps(obj) -> bytes:
+        """Serialize obj to compact JSON bytes."""
+        return orjson.dumps(obj)
+    
+    json_loads = orjson.loads
+else:
+    def json_dumps(obj) -> bytes:
+        """Serialize obj to compact JSON bytes."""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+    
+    def json_loads(data):
+        """Parse JSON from str, bytes or a memoryview slice."""
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+
+def configure_logging(logger_name: str = "ollama_mcp_client"):
+    """Print package log records to stdout as bare messages; OLLAMA_MCP_LOG_LEVEL sets the level, "off" opts out."""
+    level = os.environ.get("OLLAMA_MCP_LOG_LEVEL", "INFO").upper()
+    logger = logging.getLogger(logger_name)
+    if level == "OFF" or any(getattr(h, "_ollama_mcp_default", False) for h in logger.handlers):
+        return
+    
+    # Same output as the former print() calls; called by the CLI, never on import
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler._ollama_mcp_default = True
+    logger.addHandler(handler)
+    logger.setLevel(level if isinstance(logging.getLevelName(level), int) else logging.INFO)
+    logger.propagate = False
+
+
+async def ainput(prompt: str = "") -> str:
+    """Read a line from stdin in a daemon thread so the event loop keeps running."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def settle(value, error):
+        if not future.done():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+    
+    def read():
+        try:
+            value, error = input(prompt), None
+        except BaseException as e:
+            value, error = None, e
+        try:
+            loop.call_soon_threadsafe(settle, value, error)
+        except RuntimeError:
+            pass  # Loop already closed
+    
+    # A daemon thread, unlike the default executor, never holds up exit while input() blocks
+    threading.Thread(target=read, daemon=True).start()
+    return await future
 
 
 class LoadingIndicator:
@@ -11,33 +81,39 @@ class LoadingIndicator:
         self.message = message
         self.chars = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
         self.running = False
-        self.thread = None
+        self.task = None
+        # Pre-render every frame and the line-clear sequence
+        self._frames = [f"\r{self.message}{char}" for char in self.chars]
+        self._clear = "\r" + " " * (len(self.message) + 2) + "\r" + self.message
     
     def start(self):
-        """Start the loading animation."""
+        """Start the loading animation on the running event loop."""
         if self.running:
             return
         self.running = True
-        print(self.message, end="", flush=True)
-        self.thread = threading.Thread(target=self._animate)
-        self.thread.daemon = True
-        self.thread.start()
+        sys.stdout.write(self.message)
+        sys.stdout.flush()
+        self.task = asyncio.create_task(self._animate())
     
     def stop(self):
         """Stop the loading animation and clear the line."""
         if not self.running:
             return
         self.running = False
-        if self.thread:
-            self.thread.join(timeout=0.1)
+        if self.task:
+            # Cancellation lands on the pending sleep, so no further frame is drawn
+            self.task.cancel()
+            self.task = None
         # Clear the loading indicator
-        print("\r" + " " * (len(self.message) + 2) + "\r", end="", flush=True)
-        print(self.message, end="", flush=True)
+        sys.stdout.write(self._clear)
+        sys.stdout.flush()
     
-    def _animate(self):
+    async def _animate(self):
         """Run the loading animation."""
+        frames = self._frames
         i = 0
         while self.running:
-            print(f"\r{self.message}{self.chars[i % len(self.chars)]}", end="", flush=True)
-            time.sleep(0.1)
+            sys.stdout.write(frames[i % len(frames)])
+            sys.stdout.flush()
+            await asyncio.sleep(0.1)
             i += 1
\ No newline at end of file
@@ -1,10 +1,229 @@
 from fastmcp import FastMCP
+from typing import Any, Dict, List, Optional
+import aiohttp
+import asyncio
+import bisect
+import functools
+import inspect
+import os
+import sqlite3
+import threading
+import time
 import wikipedia
-import requests
 import json
 
 mcp = FastMCP("Ash")
 
+# The tutorial index is downloaded at most once per TTL and revalidated with its ETag
+_TUTORIALS_URL = "https://raw.githubusercontent.com/IBM/ibmdotcom-tutorials/refs/heads/main/docs_index.json"
+_TUTORIALS_TTL = 3600
+_TUTORIALS_CACHE = {"ts": 0.0, "etag": None, "index": None, "haystack": "", "starts": []}
+
+# Separates fields in the search haystack; no title or URL contains it
+_FIELD_SEP = "\x00"
+
+# Tool results memoized on disk, shared across server restarts
+_MEMO_TTL = 24 * 60 * 60
+_MEMO_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "ollama_mcp_client", "server_memo.sqlite3"
+)
+_MEMO_DB: Optional[sqlite3.Connection] = None
+# The connection is used from worker threads, one at a time
+_MEMO_LOCK = threading.Lock()
+
+# HTTP session shared by every tool call, created on first use inside the server loop
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+def _http_session() -> aiohttp.ClientSession:
+    """
+    Get the shared HTTP session, creating it on first use.
+    
+    Returns:
+        A pooled aiohttp session
+    """
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(connector=aiohttp.TCPConnector(ttl_dns_cache=300))
+    return _SESSION
+
+class _Uncached(Exception):
+    """Carries a tool result, such as an error message, that must not be memoized."""
+    
+    def __init__(self, result):
+        super().__init__(result)
+        self.result = result
+
+def _memo_db() -> Optional[sqlite3.Connection]:
+    """
+    Get the memo database, creating it and pruning expired rows on first use.
+    Call with _MEMO_LOCK held.
+    
+    Returns:
+        An open connection, or None if the cache file cannot be used
+    """
+    global _MEMO_DB
+    if _MEMO_DB is None:
+        try:
+            os.makedirs(os.path.dirname(_MEMO_PATH), exist_ok=True)
+            db = sqlite3.connect(_MEMO_PATH, timeout=5, check_same_thread=False)
+            db.execute("CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, ts REAL, value TEXT)")
+            db.execute("DELETE FROM memo WHERE ts < ?", (time.time() - _MEMO_TTL,))
+            db.commit()
+            _MEMO_DB = db
+        except (OSError, sqlite3.Error):
+            return None
+    return _MEMO_DB
+
+def _memo_get(key: str, ttl: float):
+    """
+    Look up a memoized result. Blocking; run it in a worker thread.
+    
+    Args:
+        key: The encoded call
+        ttl: Seconds a stored result stays valid
+    
+    Returns:
+        A (found, result) pair
+    """
+    with _MEMO_LOCK:
+        db = _memo_db()
+        if db is None:
+            return False, None
+        try:
+            row = db.execute("SELECT ts, value FROM memo WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            return False, None
+    if row is None or time.time() - row[0] >= ttl:
+        return False, None
+    return True, json.loads(row[1])
+
+def _memo_put(key: str, result):
+    """
+    Store a result. Blocking; run it in a worker thread.
+    
+    Args:
+        key: The encoded call
+        result: The JSON-serializable tool result
+    """
+    with _MEMO_LOCK:
+        db = _memo_db()
+        if db is None:
+            return
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO memo (key, ts, value) VALUES (?, ?, ?)",
+                (key, time.time(), json.dumps(result))
+            )
+            db.commit()
+        except sqlite3.Error:
+            pass  # A busy or read-only cache only costs a repeat lookup
+
+def _disk_memoize(ttl: float = _MEMO_TTL):
+    """
+    Memoize an async tool's results on disk, keyed by its bound arguments.
+    
+    Args:
+        ttl: Seconds a stored result is served before the tool runs again
+    
+    Returns:
+        A decorator; the tool raises _Uncached to return a result without storing it
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            # Defaults are applied so f("x") and f("x", 5) share one entry
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = json.dumps([fn.__qualname__, bound.arguments], sort_keys=True, default=str)
+            # sqlite blocks, for up to its busy timeout, so it stays off the event loop like the tool's HTTP calls
+            found, result = await asyncio.to_thread(_memo_get, key, ttl)
+            if found:
+                return result
+            
+            try:
+                result = await fn(*args, **kwargs)
+            except _Uncached as e:
+                return e.result
+            
+            await asyncio.to_thread(_memo_put, key, result)
+            return result
+        
+        return wrapper
+    return decorator
+
+async def _tutorials_index():
+    """
+    Get the tutorial index as (lowercased title, lowercased URL, tutorial) rows.
+    
+    Returns:
+        The cached rows, refreshed from GitHub once the TTL has passed
+    """
+    cache = _TUTORIALS_CACHE
+    now = time.time()
+    if cache["index"] is not None and now - cache["ts"] < _TUTORIALS_TTL:
+        return cache["index"]
+    
+    headers = {"If-None-Match": cache["etag"]} if cache["index"] is not None and cache["etag"] else {}
+    async with _http_session().get(_TUTORIALS_URL, headers=headers) as response:
+        if response.status == 304:
+            cache["ts"] = now
+            return cache["index"]
+        response.raise_for_status()  # Raise an exception for bad status codes
+        
+        # raw.githubusercontent.com serves text/plain, so parse the body rather than response.json()
+        tutorials = json.loads(await response.read())
+        etag = response.headers.get("ETag")
+    
+    # Lowercase once here instead of on every query
+    cache["index"] = [
+        (tutorial.get('title', '').lower(), tutorial.get('url', '').lower(), tutorial)
+        for tutorial in tutorials
+    ]
+    
+    # One string holding every title and URL, so a query is a C-level str.find scan
+    starts = []
+    offset = 0
+    for title, url_path, _ in cache["index"]:
+        starts.append(offset)
+        offset += len(title) + len(url_path) + 2
+    cache["haystack"] = "".join(f"{title}{_FIELD_SEP}{url_path}{_FIELD_SEP}" for title, url_path, _ in cache["index"])
+    cache["starts"] = starts
+    cache["etag"] = etag
+    cache["ts"] = now
+    return cache["index"]
+
+async def _match_tutorials(query_lower: str) -> list:
+    """
+    Find tutorials whose lowercased title or URL contains the query.
+    
+    Args:
+        query_lower: The lowercased search term
+    
+    Returns:
+        Matching tutorials in index order
+    """
+    index = await _tutorials_index()
+    if not query_lower or _FIELD_SEP in query_lower:
+        return [
+            tutorial for title, url_path, tutorial in index
+            if query_lower in title or query_lower in url_path
+        ]
+    
+    haystack, starts = _TUTORIALS_CACHE["haystack"], _TUTORIALS_CACHE["starts"]
+    matches = []
+    position = haystack.find(query_lower)
+    while position != -1:
+        # Map the hit back to its row, then resume at the next row so each tutorial matches once
+        row = bisect.bisect_right(starts, position) - 1
+        matches.append(index[row][2])
+        if row + 1 >= len(starts):
+            break
+        position = haystack.find(query_lower, starts[row + 1])
+    return matches
+
 @mcp.tool
 def add(a: int, b: int) -> int:
     """
@@ -20,7 +239,8 @@ def add(a: int, b: int) -> int:
     return a + b
 
 @mcp.tool
-def search_wikipedia(query: str, sentences: int = 5) -> str:
+@_disk_memoize()
+async def search_wikipedia(query: str, sentences: int = 5) -> str:
     """
     Search Wikipedia for a query and return a summary.
     
@@ -33,7 +253,8 @@ def search_wikipedia(query: str, sentences: int = 5) -> str:
     """
     try:
         # Get the summary of the article
-        summary = wikipedia.summary(query, sentences=sentences)
+        # The wikipedia package blocks on HTTP, so it runs in a worker thread
+        summary = await asyncio.to_thread(wikipedia.summary, query, sentences=sentences)
         return summary
     except wikipedia.exceptions.DisambiguationError as e:
         # If there are multiple options, return the first few
@@ -42,18 +263,19 @@ def search_wikipedia(query: str, sentences: int = 5) -> str:
     except wikipedia.exceptions.PageError:
         # If no page found, try searching for similar terms
         try:
-            search_results = wikipedia.search(query, results=10)
+            search_results = await asyncio.to_thread(wikipedia.search, query, results=10)
             if search_results:
                 return f"No exact match found for '{query}'. Similar articles:\n" + "\n".join(f"- {result}" for result in search_results)
             else:
                 return f"No Wikipedia articles found for '{query}'"
         except:
-            return f"Unable to search Wikipedia for '{query}'"
+            raise _Uncached(f"Unable to search Wikipedia for '{query}'")
     except Exception as e:
-        return f"Error searching Wikipedia: {str(e)}"
+        # Failures are not memoized, so the next call retries the network
+        raise _Uncached(f"Error searching Wikipedia: {str(e)}")
     
 @mcp.tool
-def search_ibmtutorials(query: str) -> str:
+async def search_ibmtutorials(query: str) -> str:
     """
     Search for tutorials on GitHub by downloading a JSON file from a GitHub repo and searching the payload for any relevant results and the respective details
     
@@ -64,25 +286,8 @@ def search_ibmtutorials(query: str) -> str:
         A formatted list of relevant tutorial results
     """
     try:
-        # Download the JSON file from the GitHub repo
-        url = "https://raw.githubusercontent.com/IBM/ibmdotcom-tutorials/refs/heads/main/docs_index.json"
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        
-        # Parse the JSON data
-        tutorials = response.json()
-        
-        # Search for relevant tutorials (case-insensitive)
-        query_lower = query.lower()
-        relevant_tutorials = []
-        
-        for tutorial in tutorials:
-            # Search in title and URL
-            title = tutorial.get('title', '').lower()
-            url_path = tutorial.get('url', '').lower()
-            
-            if query_lower in title or query_lower in url_path:
-                relevant_tutorials.append(tutorial)
+        # Search for relevant tutorials in title and URL (case-insensitive)
+        relevant_tutorials = await _match_tutorials(query.lower())
         
         # Format and return results
         if not relevant_tutorials:
@@ -106,12 +311,54 @@ def search_ibmtutorials(query: str) -> str:
         
         return "\n".join(result_lines)
         
-    except requests.exceptions.RequestException as e:
+    except aiohttp.ClientError as e:
         return f"Error fetching tutorials from GitHub: {str(e)}"
     except json.JSONDecodeError as e:
         return f"Error parsing JSON data: {str(e)}"
     except Exception as e:
         return f"Error searching IBM tutorials: {str(e)}"
 
+# Tools reachable through batch_execute
+_BATCH_TOOLS = {
+    "add": add,
+    "search_wikipedia": search_wikipedia,
+    "search_ibmtutorials": search_ibmtutorials
+}
+
+@mcp.tool
+async def batch_execute(operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Run several tools from this server in one call, concurrently.
+    
+    Args:
+        operations: List of {"name": tool name, "arguments": {...}} entries
+    
+    Returns:
+        One {"index", "tool", "ok", "result" or "error"} entry per operation, in order
+    """
+    loop = asyncio.get_running_loop()
+    
+    async def run(index, operation):
+        # A malformed entry fails its own row, not the whole batch
+        if not isinstance(operation, dict):
+            return {"index": index, "tool": "", "ok": False, "error": f"Operation must be an object, got {type(operation).__name__}"}
+        name = operation.get("name", "")
+        tool = _BATCH_TOOLS.get(name)
+        if tool is None:
+            return {"index": index, "tool": name, "ok": False, "error": f"Unknown tool '{name}'"}
+        try:
+            # The decorator may wrap the function; async tools run on the loop, sync ones in threads
+            fn = getattr(tool, "fn", tool)
+            arguments = operation.get("arguments") or {}
+            if asyncio.iscoroutinefunction(fn):
+                result = await fn(**arguments)
+            else:
+                result = await loop.run_in_executor(None, functools.partial(fn, **arguments))
+            return {"index": index, "tool": name, "ok": True, "result": result}
+        except Exception as e:
+            return {"index": index, "tool": name, "ok": False, "error": str(e)}
+    
+    return list(await asyncio.gather(*(run(i, op) for i, op in enumerate(operations))))
+
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file